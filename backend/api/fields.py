@@ -0,0 +1,58 @@
+import json
+import zlib
+
+from django.db import models
+
+class CompressedTextField(models.BinaryField):
+    """Text stored zlib-compressed in a binary column.
+
+    The empty string is stored as empty bytes, so ``exclude(field='')`` still
+    finds rows without text.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def _check_str_default_value(self):
+        # The default is text; it is compressed on save like any other value
+        return []
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return zlib.decompress(value).decode('utf-8') if value else ''
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return zlib.decompress(value).decode('utf-8') if value else ''
+        return value
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            value = zlib.compress(value.encode('utf-8')) if value else b''
+        return super().get_prep_value(value)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+class CompressedJSONField(models.BinaryField):
+    """JSON-serializable value stored as zlib-compressed JSON in a binary column"""
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return json.loads(zlib.decompress(value))
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return json.loads(zlib.decompress(value))
+        return value
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return super().get_prep_value(zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8')))
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
@@ -0,0 +1,113 @@
+import io
+import random
+
+# Synthetic resumes for benchmarks; generated from a seed so runs on
+# different commits score the same documents
+SKILLS = [
+    'Python', 'Django', 'React', 'JavaScript', 'TypeScript', 'PostgreSQL', 'Docker',
+    'Kubernetes', 'AWS', 'Terraform', 'GraphQL', 'Redis', 'Celery', 'pandas',
+    'NumPy', 'scikit-learn', 'TensorFlow', 'Spark', 'Kafka', 'Linux', 'Git',
+    'CI/CD', 'REST APIs', 'microservices', 'machine learning', 'data pipelines',
+]
+VERBS = ['Built', 'Designed', 'Led', 'Maintained', 'Migrated', 'Optimized', 'Shipped', 'Automated']
+OBJECTS = [
+    'a billing service', 'the search backend', 'an internal dashboard', 'a data warehouse',
+    'the deployment pipeline', 'a recommendation engine', 'the mobile API', 'a reporting tool',
+]
+OUTCOMES = [
+    'cutting latency by 40%', 'serving two million users', 'reducing costs by a third',
+    'with zero downtime', 'for a team of twelve engineers', 'ahead of schedule',
+]
+
+JOB_DESCRIPTION = (
+    'Senior Software Engineer. We are looking for an engineer with strong Python and Django '
+    'experience, familiarity with React, PostgreSQL and Docker, and a track record of building '
+    'REST APIs and data pipelines on AWS. Experience with machine learning is a plus.'
+)
+
+def resume_text(words=300, seed=0):
+    """Return a plausible resume of roughly the given number of words"""
+    rng = random.Random(seed)
+    lines = [
+        f'Candidate {seed}',
+        'Software Engineer',
+        'Skills: ' + ', '.join(rng.sample(SKILLS, 8)),
+        'Experience',
+    ]
+    count = sum(len(line.split()) for line in lines)
+    while count < words:
+        line = (f'{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)} '
+                f'and {rng.choice(SKILLS)}, {rng.choice(OUTCOMES)}.')
+        lines.append(line)
+        count += len(line.split())
+    return '\n'.join(lines)
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def text_pdf(text, lines_per_page=50):
+    """Return the bytes of a PDF with a real text layer holding the given text"""
+    lines = text.splitlines() or ['']
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    # Object 1 is the catalog, 2 the page tree, 3 the font, then a page and
+    # a content stream per page
+    objects = [None, None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for page_lines in pages:
+        stream = 'BT /F1 10 Tf 14 TL 50 760 Td ' + ' '.join(
+            f'({_pdf_escape(line)}) Tj T*' for line in page_lines
+        ) + ' ET'
+        stream = stream.encode('latin-1', 'replace')
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_id)
+        page_ids.append(len(objects))
+    objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % page_id for page_id in page_ids), len(page_ids)
+    )
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b'%010d 00000 n \n' % offset)
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def scanned_pdf(text, lines_per_page=50, dpi=100):
+    """Return the bytes of an image-only PDF, as a scanner would produce"""
+    from PIL import Image, ImageDraw
+
+    lines = text.splitlines() or ['']
+    width, height = int(8.5 * dpi), 11 * dpi
+    line_height = max(12, dpi // 6)
+    images = []
+    for start in range(0, len(lines), lines_per_page):
+        image = Image.new('L', (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        for row, line in enumerate(lines[start:start + lines_per_page]):
+            draw.text((dpi // 2, dpi // 2 + row * line_height), line, fill=0)
+        images.append(image)
+
+    out = io.BytesIO()
+    images[0].save(out, format='PDF', resolution=dpi, save_all=True, append_images=images[1:])
+    return out.getvalue()
+
+def docx_file(text):
+    """Return the bytes of a DOCX document with one paragraph per line"""
+    import docx
+
+    document = docx.Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
@@ -0,0 +1,143 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api.management.commands import _samples as samples
+from api.utils.analyzer import analyze_resume, extract_keywords
+from api.utils.parser import parse_docx, parse_pdf
+
+KEYWORD_LENGTHS = [100, 1000, 10000]
+HR_BATCH_SIZES = [1, 10, 100]
+
+class Command(BaseCommand):
+    help = 'Benchmark the parser, analyzer and HR endpoint on generated fixtures and print JSON results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case')
+        parser.add_argument('--only', action='append', default=[],
+                            help='Run only cases whose name starts with this prefix (repeatable)')
+        parser.add_argument('--hr-sizes', default=','.join(map(str, HR_BATCH_SIZES)),
+                            help='Comma-separated batch sizes for the HR endpoint')
+        parser.add_argument('--output', help='Also write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        self.workdir = tempfile.mkdtemp(prefix='ats-bench-')
+        cases = self._cases([int(size) for size in options['hr_sizes'].split(',') if size])
+        if options['only']:
+            cases = [case for case in cases if case[0].startswith(tuple(options['only']))]
+
+        results = {}
+        old_db = None
+        setup_test_environment()
+        try:
+            if any(name.startswith('hr_analyze') for name, _ in cases):
+                # Uploads are written to a throwaway database and media directory
+                old_db = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            with override_settings(MEDIA_ROOT=os.path.join(self.workdir, 'media')):
+                for name, case in cases:
+                    self.stderr.write(f'{name} ...')
+                    results[name] = self._measure(case, options['repeat'])
+        finally:
+            if old_db is not None:
+                connection.creation.destroy_test_db(old_db, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        output = json.dumps({'meta': self._meta(options), 'results': results}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
+
+    def _measure(self, case, repeat):
+        """Time a case; case(i) prepares run i and returns the callable to time"""
+        try:
+            # The first run loads models and warms caches, so it is not counted
+            case(-1)()
+            runs = []
+            for i in range(repeat):
+                run = case(i)
+                start = time.perf_counter()
+                run()
+                runs.append(time.perf_counter() - start)
+        except Exception as e:
+            return {'error': str(e)}
+        return {
+            'runs': len(runs),
+            'min': round(min(runs), 6),
+            'median': round(statistics.median(runs), 6),
+            'mean': round(statistics.mean(runs), 6),
+            'max': round(max(runs), 6),
+        }
+
+    def _write(self, name, content):
+        path = os.path.join(self.workdir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def _cases(self, hr_sizes):
+        text = samples.resume_text(words=600)
+        text_pdf = self._write('resume.pdf', samples.text_pdf(text))
+        scanned_pdf = self._write('scanned.pdf', samples.scanned_pdf(text, lines_per_page=25))
+        docx_path = self._write('resume.docx', samples.docx_file(text))
+
+        cases = [
+            ('parse_pdf[text]', lambda i: lambda: parse_pdf(text_pdf)),
+            ('parse_pdf[scanned]', lambda i: lambda: parse_pdf(scanned_pdf)),
+            ('parse_docx', lambda i: lambda: parse_docx(docx_path)),
+        ]
+        for words in KEYWORD_LENGTHS:
+            keyword_text = samples.resume_text(words=words)
+            cases.append((f'extract_keywords[{words}]', lambda i, t=keyword_text: lambda: extract_keywords(t)))
+        cases.append(('analyze_resume', lambda i: lambda: analyze_resume(text, samples.JOB_DESCRIPTION)))
+        for size in hr_sizes:
+            cases.append((f'hr_analyze[{size}]', lambda i, size=size: self._hr_request(size, i)))
+        return cases
+
+    def _hr_request(self, size, iteration):
+        # Fresh documents every run, so the parse cache never short-circuits parsing
+        files = [
+            SimpleUploadedFile(
+                f'resume-{iteration}-{n}.pdf',
+                samples.text_pdf(samples.resume_text(words=400, seed=(iteration + 2) * 1000 + n)),
+                'application/pdf',
+            )
+            for n in range(size)
+        ]
+
+        def run():
+            response = Client().post('/api/hr/analyze/', {
+                'resumes': files,
+                'job_description': samples.JOB_DESCRIPTION,
+            })
+            if response.status_code != 201:
+                raise RuntimeError(f'HR endpoint returned {response.status_code}: {response.content[:200]!r}')
+        return run
+
+    def _meta(self, options):
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                    cwd=settings.BASE_DIR).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': options['repeat'],
+        }
@@ -0,0 +1,45 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SNIPPET = '''
+import os, time, json
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+start = time.perf_counter()
+import django
+django.setup()
+import api.views
+imported = time.perf_counter()
+from api.utils.analyzer import preload
+{preload}
+print(json.dumps({{'import': imported - start, 'preload': time.perf_counter() - imported}}))
+'''
+
+class Command(BaseCommand):
+    help = 'Measure process startup cost with and without loading the NLP models'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Fresh processes per scenario')
+
+    def _run(self, preload):
+        code = SNIPPET.format(
+            settings_module=settings.SETTINGS_MODULE,
+            preload='preload()' if preload else '',
+        )
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                                text=True, check=True, cwd=settings.BASE_DIR)
+        return json.loads(output.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        results = {}
+        for scenario, preload in (('lazy', False), ('preloaded', True)):
+            runs = [self._run(preload) for _ in range(options['repeat'])]
+            results[scenario] = {
+                'import_seconds': min(run['import'] for run in runs),
+                'total_seconds': min(run['import'] + run['preload'] for run in runs),
+            }
+        # 'preloaded' total is what every process paid when the models loaded at import
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.models import Resume, JobPosting
+from api.utils.corpus import CorpusModel
+
+class Command(BaseCommand):
+    help = 'Fit or incrementally update the corpus TF-IDF model over stored resumes and job postings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Discard the existing model and fit from scratch')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Rows fetched from the database at a time')
+
+    def handle(self, *args, **options):
+        path = settings.CORPUS_MODEL_PATH
+        try:
+            model = CorpusModel() if options['rebuild'] else CorpusModel.load(path)
+        except FileNotFoundError:
+            model = CorpusModel()
+
+        n_before = model.n_documents
+        chunk_size = options['chunk_size']
+
+        # Identical uploads share one content hash, so only count each document once
+        resumes = (Resume.objects.filter(id__gt=model.last_resume_id)
+                   .exclude(extracted_text='')
+                   .order_by('id')
+                   .values_list('id', 'content_hash', 'extracted_text'))
+        seen_hashes = set()
+        if model.last_resume_id:
+            seen_hashes.update(Resume.objects.filter(id__lte=model.last_resume_id)
+                               .exclude(extracted_text='')
+                               .values_list('content_hash', flat=True))
+        for resume_id, content_hash, text in resumes.iterator(chunk_size=chunk_size):
+            if content_hash not in seen_hashes:
+                seen_hashes.add(content_hash)
+                model.partial_fit([text])
+            model.last_resume_id = resume_id
+
+        postings = (JobPosting.objects.filter(id__gt=model.last_posting_id)
+                    .order_by('id')
+                    .values_list('id', 'description'))
+        for posting_id, description in postings.iterator(chunk_size=chunk_size):
+            model.partial_fit([description])
+            model.last_posting_id = posting_id
+
+        model.save(path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Corpus model saved to {path}: {model.n_documents} documents '
+            f'({model.n_documents - n_before} new), {len(model.terms)} terms'
+        ))
@@ -0,0 +1,64 @@
+import json
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import JobPosting
+from api.utils.archives import ingest_zip
+from api.utils.postings import get_or_create_posting, refresh_posting
+
+class Command(BaseCommand):
+    help = 'Store, analyze and rank every resume in a zip archive against a job posting'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help='Path to a zip archive of PDF and DOCX resumes')
+        job = parser.add_mutually_exclusive_group(required=True)
+        job.add_argument('--job-posting-id', type=int, help='Existing JobPosting to score against')
+        job.add_argument('--job-description', help='Job description text; stored as a JobPosting')
+        parser.add_argument('--batch-size', type=int, help='Resumes stored and analyzed per batch')
+        parser.add_argument('--limit', type=int, default=20, help='Number of top results to print')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        if not zipfile.is_zipfile(options['archive']):
+            raise CommandError(f"{options['archive']} is not a zip archive")
+
+        if options['job_posting_id']:
+            try:
+                job_posting = refresh_posting(JobPosting.objects.get(id=options['job_posting_id']))
+            except JobPosting.DoesNotExist:
+                raise CommandError(f"Job posting {options['job_posting_id']} does not exist")
+        else:
+            job_posting = get_or_create_posting(options['job_description'])
+
+        results, errors, duplicates = ingest_zip(options['archive'], job_posting, batch_size=options['batch_size'])
+        results.sort(key=lambda result: result['feedback']['ats_score']['score'], reverse=True)
+        ranked = [
+            {
+                'entry': result['file'],
+                'id': result['resume'].id,
+                'analysis_id': result['analysis'].id,
+                'ats_score': result['feedback']['ats_score']['score'],
+                'file': result['resume'].file.name,
+            }
+            for result in results[:options['limit']]
+        ]
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'job_posting_id': job_posting.id,
+                'total_count': len(results),
+                'results': ranked,
+                'errors': errors,
+                'duplicates': duplicates,
+            }))
+            return
+
+        self.stdout.write(f'Analyzed {len(results)} resumes against job posting {job_posting.id} '
+                          f'({len(duplicates)} duplicates skipped, {len(errors)} failed)')
+        for rank, result in enumerate(ranked, start=1):
+            self.stdout.write(f"{rank:>4}. {result['ats_score']:6.2f}  resume {result['id']}  {result['entry']}")
+        for duplicate in duplicates:
+            self.stdout.write(f"  duplicate  {duplicate['file']} (same as {duplicate['duplicate_of']})")
+        for error in errors:
+            self.stderr.write(f"  failed  {error['file']}: {error['error']}")
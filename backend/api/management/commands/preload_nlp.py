@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils import analyzer
+
+class Command(BaseCommand):
+    help = 'Check that NLP resources are installed locally and load them, without touching the network'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--download', action='store_true',
+                            help='Download the spaCy model if it is missing')
+
+    def handle(self, *args, **options):
+        import spacy
+
+        model = analyzer.SPACY_MODEL
+        if not spacy.util.is_package(model):
+            if not options['download']:
+                raise CommandError(
+                    f"spaCy model '{model}' is not installed. "
+                    f"Run 'python -m spacy download {model}' or pass --download."
+                )
+            spacy.cli.download(model)
+
+        start = time.perf_counter()
+        analyzer.preload()
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded '{model}' ({', '.join(analyzer.get_nlp().pipe_names)}) "
+            f"in {time.perf_counter() - start:.2f}s"
+        ))
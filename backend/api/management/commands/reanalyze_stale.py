@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import AnalysisResult, Resume
+from api.utils.analyzer import ANALYZER_VERSION, analyze_features
+from api.utils.pipeline import resume_features
+from api.utils.postings import refresh_posting
+
+class Command(BaseCommand):
+    help = ('Recompute analyses made by an older analyzer version from the stored resume text, '
+            'then re-extract and re-index the keywords of every other resume with older features')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Analyses or resumes recomputed and committed at a time')
+        parser.add_argument('--start-after', type=int, default=0,
+                            help='Only consider analyses with a higher id')
+
+    def handle(self, *args, **options):
+        # Each batch is committed with the current version, so an interrupted
+        # run simply picks up the remaining stale rows when started again
+        stale = (AnalysisResult.objects.exclude(analyzer_version=ANALYZER_VERSION)
+                 .filter(job_posting__isnull=False)
+                 .select_related('resume', 'job_posting')
+                 .order_by('id'))
+        postings = {}
+        last_id = options['start_after']
+        updated = skipped = 0
+
+        while True:
+            batch = list(stale.filter(id__gt=last_id)[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            # Original files are never opened; rows whose text was not kept are left alone
+            analyses = [analysis for analysis in batch if analysis.resume.extracted_text]
+            skipped += len(batch) - len(analyses)
+
+            with transaction.atomic():
+                features = resume_features(
+                    [analysis.resume for analysis in analyses],
+                    batch_size=settings.ANALYZER_BATCH_SIZE,
+                    n_process=settings.ANALYZER_N_PROCESS,
+                )
+                by_posting = {}
+                for analysis, resume_feature in zip(analyses, features):
+                    by_posting.setdefault(analysis.job_posting_id, []).append((analysis, resume_feature))
+
+                for posting_id, group in by_posting.items():
+                    if posting_id not in postings:
+                        postings[posting_id] = refresh_posting(group[0][0].job_posting)
+                    feedbacks = analyze_features([feature for _, feature in group], postings[posting_id].profile())
+                    for (analysis, _), feedback in zip(group, feedbacks):
+                        analysis.set_feedback(feedback)
+                        analysis.analyzer_version = ANALYZER_VERSION
+
+                AnalysisResult.objects.bulk_update(
+                    analyses,
+                    ['keywords_matched', 'missing_keywords', 'score', 'similarity_score',
+                     'ats_score', 'feedback', 'analyzer_version'],
+                )
+            updated += len(analyses)
+            self.stdout.write(f'Reanalyzed {updated} analyses (last id {last_id})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Reanalyzed {updated} analyses at analyzer version {ANALYZER_VERSION}; '
+            f'skipped {skipped} without stored text'
+        ))
+
+        reindexed, skipped = self.reindex_stale_resumes(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-indexed {reindexed} resumes at analyzer version {ANALYZER_VERSION}; '
+            f'skipped {skipped} without stored text'
+        ))
+
+    def reindex_stale_resumes(self, batch_size):
+        """Recompute the features and keyword postings of resumes from an older analyzer.
+
+        Search normalizes queries the way the current analyzer extracts
+        keywords, so postings of older resumes would silently stop matching.
+        Resumes are walked by id in committed batches, like the analyses.
+        """
+        stale = Resume.objects.exclude(features_version=ANALYZER_VERSION).order_by('id')
+        last_id = 0
+        updated = skipped = 0
+
+        while True:
+            batch = list(stale.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            resumes = [resume for resume in batch if resume.extracted_text]
+            skipped += len(batch) - len(resumes)
+            # Stores the features and rebuilds the postings in one transaction
+            resume_features(
+                resumes,
+                batch_size=settings.ANALYZER_BATCH_SIZE,
+                n_process=settings.ANALYZER_N_PROCESS,
+            )
+            updated += len(resumes)
+            self.stdout.write(f'Re-indexed {updated} resumes (last id {last_id})')
+
+        return updated, skipped
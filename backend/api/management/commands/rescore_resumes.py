@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import JobPosting
+from api.utils.postings import get_or_create_posting, refresh_posting
+from api.utils.rescore import rank_stored_resumes
+
+class Command(BaseCommand):
+    help = 'Rank every stored resume against a job posting'
+
+    def add_arguments(self, parser):
+        job = parser.add_mutually_exclusive_group(required=True)
+        job.add_argument('--job-posting-id', type=int, help='Existing JobPosting to score against')
+        job.add_argument('--job-description', help='Job description text; stored as a JobPosting')
+        parser.add_argument('--limit', type=int, default=20, help='Number of top results to print')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        if options['job_posting_id']:
+            try:
+                job_posting = refresh_posting(JobPosting.objects.get(id=options['job_posting_id']))
+            except JobPosting.DoesNotExist:
+                raise CommandError(f"Job posting {options['job_posting_id']} does not exist")
+        else:
+            job_posting = get_or_create_posting(options['job_description'])
+
+        results, total, skipped = rank_stored_resumes(job_posting.profile(), limit=options['limit'])
+
+        if options['json']:
+            self.stdout.write(json.dumps({'job_posting_id': job_posting.id, 'total_resumes': total,
+                                          'skipped_stale': skipped, 'results': results}))
+            return
+
+        self.stdout.write(f'Scored {total} resumes against job posting {job_posting.id}')
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Skipped {skipped} resumes without current features; run reanalyze_stale to include them'
+            ))
+        for rank, result in enumerate(results, start=1):
+            self.stdout.write(f"{rank:>4}. {result['ats_score']:6.2f}  resume {result['id']}  {result['file']}")
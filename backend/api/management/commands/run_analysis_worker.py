@@ -0,0 +1,40 @@
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.utils.jobs import claim_items, process_items
+
+class Command(BaseCommand):
+    help = 'Process queued resume analysis jobs. Run several workers to scale out.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ANALYZER_BATCH_SIZE,
+                            help='Items claimed and analyzed together')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of polling')
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f'Analysis worker {worker} started')
+
+        try:
+            while True:
+                items = claim_items(worker, options['batch_size'])
+                if items:
+                    recorded = process_items(items)
+                    failed = sum(item.status == 'FAILED' for item in recorded)
+                    self.stdout.write(f'Processed {len(recorded)} items ({failed} failed, '
+                                      f'{len(items) - len(recorded)} reclaimed by other workers)')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f'Analysis worker {worker} stopped')
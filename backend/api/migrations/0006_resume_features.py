@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_job_posting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='keywords',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='term_counts',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:13
+
+import json
+
+from django.db import migrations, models
+
+
+def populate_ats_score(apps, schema_editor):
+    AnalysisResult = apps.get_model('api', 'AnalysisResult')
+    batch = []
+    for analysis in AnalysisResult.objects.only('id', 'feedback').iterator(chunk_size=1000):
+        # Older rows hold the feedback as a JSON-encoded string
+        feedback = json.loads(analysis.feedback) if isinstance(analysis.feedback, str) else analysis.feedback
+        if 'ats_score' in feedback:
+            analysis.ats_score = feedback['ats_score']['score']
+        else:
+            # Rows written before the ATS score existed: weigh their keyword
+            # match and similarity (both in percent) as the analyzer does
+            keyword_match = feedback.get('keyword_match', {}).get('score', 0)
+            similarity = feedback.get('semantic_similarity', {}).get('score', 0)
+            analysis.ats_score = round(0.6 * keyword_match + 0.4 * similarity, 2)
+        batch.append(analysis)
+        if len(batch) >= 1000:
+            AnalysisResult.objects.bulk_update(batch, ['ats_score'])
+            batch = []
+    AnalysisResult.objects.bulk_update(batch, ['ats_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_resume_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisresult',
+            name='ats_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(populate_ats_score, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['-ats_score', '-id'], name='analysis_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['job_posting', '-ats_score', '-id'], name='analysis_posting_rank_idx'),
+        ),
+    ]
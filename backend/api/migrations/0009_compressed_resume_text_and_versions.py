@@ -0,0 +1,99 @@
+from django.db import migrations, models
+
+import api.fields
+
+
+def compress_resume_fields(apps, schema_editor):
+    Resume = apps.get_model('api', 'Resume')
+    batch = []
+    for resume in Resume.objects.only('id', 'extracted_text', 'keywords', 'term_counts').iterator(chunk_size=500):
+        resume.extracted_text_z = resume.extracted_text
+        resume.keywords_z = resume.keywords
+        resume.term_counts_z = resume.term_counts
+        batch.append(resume)
+        if len(batch) >= 500:
+            Resume.objects.bulk_update(batch, ['extracted_text_z', 'keywords_z', 'term_counts_z'])
+            batch = []
+    Resume.objects.bulk_update(batch, ['extracted_text_z', 'keywords_z', 'term_counts_z'])
+
+
+def decompress_resume_fields(apps, schema_editor):
+    Resume = apps.get_model('api', 'Resume')
+    for resume in Resume.objects.iterator(chunk_size=500):
+        resume.extracted_text = resume.extracted_text_z
+        resume.keywords = resume.keywords_z
+        resume.term_counts = resume.term_counts_z
+        resume.save(update_fields=['extracted_text', 'keywords', 'term_counts'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_analysis_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='extracted_text_z',
+            field=api.fields.CompressedTextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='keywords_z',
+            field=api.fields.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='term_counts_z',
+            field=api.fields.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_resume_fields, decompress_resume_fields),
+        migrations.RemoveField(
+            model_name='resume',
+            name='extracted_text',
+        ),
+        migrations.RemoveField(
+            model_name='resume',
+            name='keywords',
+        ),
+        migrations.RemoveField(
+            model_name='resume',
+            name='term_counts',
+        ),
+        migrations.RenameField(
+            model_name='resume',
+            old_name='extracted_text_z',
+            new_name='extracted_text',
+        ),
+        migrations.RenameField(
+            model_name='resume',
+            old_name='keywords_z',
+            new_name='keywords',
+        ),
+        migrations.RenameField(
+            model_name='resume',
+            old_name='term_counts_z',
+            new_name='term_counts',
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='parser_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='features_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='analyzer_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='analysisresult',
+            name='analyzer_version',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:28
+
+import json
+
+from django.db import migrations, models
+
+# Keys rebuilt from columns by AnalysisResult.to_feedback()
+DERIVED_KEYS = ('ats_score', 'keyword_match', 'semantic_similarity', 'missing_keywords')
+FIELDS = ['keywords_matched', 'missing_keywords', 'score', 'similarity_score', 'feedback']
+
+
+def compact_feedback(apps, schema_editor):
+    AnalysisResult = apps.get_model('api', 'AnalysisResult')
+    batch = []
+    for analysis in AnalysisResult.objects.only('id', *FIELDS).iterator(chunk_size=1000):
+        # Older rows hold the feedback as a JSON-encoded string
+        feedback = json.loads(analysis.feedback) if isinstance(analysis.feedback, str) else analysis.feedback
+        keyword_match = feedback.get('keyword_match', {})
+        analysis.keywords_matched = keyword_match.get('matched_keywords', analysis.keywords_matched)
+        analysis.missing_keywords = feedback.get('missing_keywords', keyword_match.get('missing_keywords', []))
+        analysis.score = keyword_match.get('score', analysis.score * 100) / 100
+        analysis.similarity_score = feedback.get('semantic_similarity', {}).get('score', 0) / 100
+        analysis.feedback = {key: value for key, value in feedback.items() if key not in DERIVED_KEYS}
+        batch.append(analysis)
+        if len(batch) >= 1000:
+            AnalysisResult.objects.bulk_update(batch, FIELDS)
+            batch = []
+    AnalysisResult.objects.bulk_update(batch, FIELDS)
+
+
+def expand_feedback(apps, schema_editor):
+    AnalysisResult = apps.get_model('api', 'AnalysisResult')
+    batch = []
+    for analysis in AnalysisResult.objects.iterator(chunk_size=1000):
+        analysis.feedback = {
+            'ats_score': {'score': analysis.ats_score},
+            'keyword_match': {
+                'score': round(analysis.score * 100, 2),
+                'matched_keywords': analysis.keywords_matched,
+                'missing_keywords': analysis.missing_keywords,
+            },
+            'semantic_similarity': {'score': round(analysis.similarity_score * 100, 2)},
+            'missing_keywords': analysis.missing_keywords,
+            **analysis.feedback,
+        }
+        batch.append(analysis)
+        if len(batch) >= 1000:
+            AnalysisResult.objects.bulk_update(batch, ['feedback'])
+            batch = []
+    AnalysisResult.objects.bulk_update(batch, ['feedback'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_compressed_resume_text_and_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisresult',
+            name='missing_keywords',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='analysisresult',
+            name='similarity_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='analysisresult',
+            name='feedback',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(compact_feedback, expand_feedback),
+    ]
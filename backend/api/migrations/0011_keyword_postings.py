@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:36
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_keywords(apps, schema_editor):
+    Resume = apps.get_model('api', 'Resume')
+    KeywordPosting = apps.get_model('api', 'KeywordPosting')
+    batch = []
+    for resume in Resume.objects.exclude(keywords__isnull=True).only('id', 'keywords').iterator(chunk_size=1000):
+        batch.extend(
+            KeywordPosting(keyword=keyword, resume_id=resume.id, count=count)
+            for keyword, count in Counter(resume.keywords).items()
+            if len(keyword) <= 100
+        )
+        if len(batch) >= 5000:
+            KeywordPosting.objects.bulk_create(batch)
+            batch = []
+    KeywordPosting.objects.bulk_create(batch)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_compact_analysis_feedback'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeywordPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keyword', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keyword_postings', to='api.resume')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('keyword', 'resume'), name='keyword_posting_unique')],
+            },
+        ),
+        migrations.RunPython(index_keywords, migrations.RunPython.noop),
+    ]
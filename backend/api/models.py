@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+from .fields import CompressedTextField, CompressedJSONField
+from .utils.feedback import DERIVED_KEYS, SIMILARITY_DESCRIPTION, ats_rating
+
 class User(AbstractUser):
     ROLE_CHOICES = [
         ('STUDENT', 'Student'),
@@ -28,18 +31,136 @@ class User(AbstractUser):
 class Resume(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='resumes', null=True, blank=True)
     file = models.FileField(upload_to='resumes/')
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    extracted_text = CompressedTextField(blank=True)
+    parser_version = models.PositiveSmallIntegerField(default=0)
+    # Analyzer features of extracted_text; None until computed
+    keywords = CompressedJSONField(null=True, blank=True)
+    term_counts = CompressedJSONField(null=True, blank=True)
+    features_version = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"Resume {self.id} by {self.user.username if self.user else 'Public Upload'}"
 
+class KeywordPosting(models.Model):
+    """Inverted index entry: how often a keyword occurs in a resume's extracted keywords"""
+    keyword = models.CharField(max_length=100)
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='keyword_postings')
+    count = models.PositiveIntegerField(default=1)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['keyword', 'resume'], name='keyword_posting_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.keyword} in Resume {self.resume_id}"
+
+class JobPosting(models.Model):
+    title = models.CharField(max_length=255, blank=True)
+    description = models.TextField()
+    content_hash = models.CharField(max_length=64, unique=True)
+    # Keyword and term frequency tables
+    keywords = models.JSONField(default=dict)
+    term_counts = models.JSONField(default=dict)
+    analyzer_version = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def profile(self):
+        """Return the precomputed job profile in the form the analyzer expects"""
+        return {
+            'keywords': self.keywords,
+            'term_counts': self.term_counts,
+        }
+    
+    def __str__(self):
+        return self.title or f"Job Posting {self.id}"
+
 class AnalysisResult(models.Model):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='analysis_results')
+    job_posting = models.ForeignKey(JobPosting, on_delete=models.SET_NULL, related_name='analysis_results', null=True, blank=True)
     keywords_matched = models.JSONField()
+    missing_keywords = models.JSONField(default=list)
+    # Keyword match and semantic similarity as fractions, ATS score in percent
     score = models.FloatField()
-    feedback = models.JSONField()
+    similarity_score = models.FloatField(default=0)
+    ats_score = models.FloatField(default=0)
+    # Only the parts of the analyzer feedback not kept in the columns above
+    feedback = models.JSONField(default=dict)
+    analyzer_version = models.PositiveSmallIntegerField(default=0, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-ats_score', '-id'], name='analysis_rank_idx'),
+            models.Index(fields=['job_posting', '-ats_score', '-id'], name='analysis_posting_rank_idx'),
+        ]
 
     def __str__(self):
         return f"Analysis for Resume {self.resume.id}"
+
+    def set_feedback(self, feedback):
+        """Split an analyzer feedback dict into the score columns and the remaining extras"""
+        self.keywords_matched = feedback['keyword_match']['matched_keywords']
+        self.missing_keywords = feedback['missing_keywords']
+        self.score = feedback['keyword_match']['score'] / 100
+        self.similarity_score = feedback['semantic_similarity']['score'] / 100
+        self.ats_score = feedback['ats_score']['score']
+        self.feedback = {key: value for key, value in feedback.items() if key not in DERIVED_KEYS}
+
+    def to_feedback(self):
+        """Rebuild the analyzer feedback dict the API returns"""
+        extras = dict(self.feedback)
+        return {
+            'ats_score': {
+                'score': self.ats_score,
+                'rating': ats_rating(self.ats_score)
+            },
+            'keyword_match': {
+                'score': round(self.score * 100, 2),
+                'matched_keywords': self.keywords_matched,
+                'missing_keywords': self.missing_keywords
+            },
+            'semantic_similarity': {
+                'score': round(self.similarity_score * 100, 2),
+                'description': SIMILARITY_DESCRIPTION
+            },
+            'suggestions': extras.pop('suggestions', []),
+            'missing_keywords': self.missing_keywords,
+            **extras
+        }
+
+class AnalysisJob(models.Model):
+    job_posting = models.ForeignKey(JobPosting, on_delete=models.CASCADE, related_name='analysis_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Analysis Job {self.id}"
+
+class AnalysisJobItem(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    job = models.ForeignKey(AnalysisJob, on_delete=models.CASCADE, related_name='items')
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='analysis_job_items')
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    error = models.TextField(blank=True)
+    analysis = models.ForeignKey(AnalysisResult, on_delete=models.SET_NULL, related_name='+', null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='job_item_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
@@ -1,14 +1,23 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ResumeViewSet, health_check, HRViewSet
+from .utils.uploads import ArchiveUploadParser
+from .views import ResumeViewSet, health_check, metrics, HRViewSet, JobPostingViewSet, AnalysisJobViewSet
 
 router = DefaultRouter()
 router.register(r'resumes', ResumeViewSet, basename='resume')
+router.register(r'job-postings', JobPostingViewSet, basename='job-posting')
+router.register(r'jobs', AnalysisJobViewSet, basename='analysis-job')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('resumes/upload/', ResumeViewSet.as_view({'post': 'upload_resume'}), name='resume-upload'),
     path('resumes/<int:pk>/analysis/', ResumeViewSet.as_view({'get': 'get_analysis'}), name='resume-analysis'),
     path('health/', health_check, name='health-check'),
+    path('metrics/', metrics, name='metrics'),
     path('hr/analyze/', HRViewSet.as_view({'post': 'upload_multiple_resumes'}), name='hr-analyze'),
+    path('hr/ingest-zip/', HRViewSet.as_view({'post': 'ingest_zip_archive'}, parser_classes=[ArchiveUploadParser]),
+         name='hr-ingest-zip'),
+    path('hr/rescore/', HRViewSet.as_view({'post': 'rescore_resumes'}), name='hr-rescore'),
+    path('hr/search/', HRViewSet.as_view({'get': 'search_resumes'}), name='hr-search'),
+    path('hr/ranked/', HRViewSet.as_view({'get': 'get_ranked_resumes'}), name='hr-ranked'),
 ]
@@ -1,76 +1,290 @@
-import spacy
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from django.conf import settings
+from collections import Counter
+import hashlib
 import json
+import math
+import threading
+import time
 
-nltk.download('punkt')
-nltk.download('stopwords')
+from .metrics import observe, timed
+from .corpus import tokenize, get_corpus_model
+from .feedback import SIMILARITY_DESCRIPTION, ats_rating
+from .skills import SKILLS
 
-# Load English model for spaCy
-nlp = spacy.load('en_core_web_sm')
+SPACY_MODEL = 'en_core_web_sm'
 
-STOP_WORDS = set(stopwords.words('english'))
+# Bump whenever keyword extraction or scoring changes; stored features and
+# analyses with an older version are recomputed by ``manage.py reanalyze_stale``
+ANALYZER_VERSION = 2
 
+# Pipeline components left out of each profile. Keyword extraction only reads
+# token.pos_, token.is_stop, token.lower_ and token.lemma_, which tok2vec,
+# tagger, attribute_ruler and lemmatizer provide; the parser and NER are dead
+# weight.
+PIPELINE_PROFILES = {
+    'full': [],
+    'fast': ['parser', 'senter', 'ner'],
+}
+
+# The spaCy model takes seconds to load, so it is loaded on first use rather
+# than at import; manage.py commands that never analyze never pay for it
+_nlp = None
+_nlp_lock = threading.Lock()
+
+_skill_matcher = None
+_skill_matcher_lock = threading.Lock()
+
+def load_pipeline(profile):
+    """Load the spaCy model with the components the profile does not need excluded"""
+    import spacy
+    return spacy.load(SPACY_MODEL, exclude=PIPELINE_PROFILES[profile])
+
+def get_nlp():
+    """Return the shared spaCy pipeline, loading it once on first use"""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                _nlp = load_pipeline(settings.SPACY_PIPELINE_PROFILE)
+    return _nlp
+
+def preload():
+    """Load the NLP model and corpus TF-IDF model up front.
+
+    Called before forking server workers so they share the loaded models
+    copy-on-write instead of each loading their own.
+    """
+    get_nlp()
+    tokenize('')
+    get_corpus_model()
+
+def get_skill_matcher():
+    """Return the PhraseMatcher for the skills vocabulary, built once on first use.
+
+    Patterns only need tokenizing, and match on lowercased token text, so
+    a blank English pipeline builds a matcher that works on docs from any
+    English pipeline.
+    """
+    global _skill_matcher
+    if _skill_matcher is None:
+        with _skill_matcher_lock:
+            if _skill_matcher is None:
+                import spacy
+                from spacy.matcher import PhraseMatcher
+                nlp = spacy.blank('en')
+                matcher = PhraseMatcher(nlp.vocab, attr='LOWER')
+                for skill, phrases in SKILLS.items():
+                    matcher.add(skill, [nlp.make_doc(phrase) for phrase in phrases])
+                names = {nlp.vocab.strings[skill]: skill for skill in SKILLS}
+                _skill_matcher = matcher, names
+    return _skill_matcher
+
+def _skill_spans(doc):
+    """Yield (start, end, skill) for each skill phrase in a doc, longest match first where they overlap"""
+    matcher, names = get_skill_matcher()
+    taken = set()
+    for match_id, start, end in sorted(matcher(doc), key=lambda match: (match[1] - match[2], match[1])):
+        if taken.isdisjoint(range(start, end)):
+            taken.update(range(start, end))
+            yield start, end, names[match_id]
+
+@timed('nlp')
 def extract_keywords(text):
-    """Extract keywords from text using spaCy"""
-    doc = nlp(text)
-    keywords = []
+    """Extract a keyword frequency table from text using spaCy"""
+    return _keywords_from_doc(get_nlp()(text))
+
+def _keywords_from_doc(doc):
+    """Count the keywords of an already processed spaCy doc.
+
+    Skills vocabulary phrases count once under their canonical name; other
+    nouns, verbs and adjectives count under their lowercased lemma, so
+    inflections of a word share one entry.
+    """
+    keywords = Counter()
+    covered = set()
+    for start, end, skill in _skill_spans(doc):
+        keywords[skill] += 1
+        covered.update(range(start, end))
     
     for token in doc:
-        # Keep nouns, verbs, and adjectives
-        if token.pos_ in ['NOUN', 'VERB', 'ADJ'] and not token.is_stop:
-            keywords.append(token.text.lower())
+        if token.i not in covered and token.pos_ in ('NOUN', 'VERB', 'ADJ') and not token.is_stop:
+            keywords[token.lemma_.lower()] += 1
     
     return keywords
 
+def skill_name(text):
+    """Return the skill a phrase names as a whole, or None"""
+    doc = get_nlp().make_doc(text)
+    for start, end, skill in _skill_spans(doc):
+        if start == 0 and end == len(doc):
+            return skill
+    return None
+
+def normalize_keyword(word):
+    """Return the form extract_keywords counts a single word under"""
+    skill = skill_name(word)
+    if skill is not None:
+        return skill
+    return ' '.join(token.lemma_.lower() for token in get_nlp()(word))
+
+def _term_counts(text):
+    """Count the terms TfidfVectorizer would see in a document"""
+    return Counter(tokenize(text))
+
+def _tfidf_similarity(resume_counts, job_counts):
+    """Cosine similarity of two documents under a TF-IDF fitted on just the pair.
+
+    Equivalent to fitting TfidfVectorizer on [resume, job] with smoothed IDF:
+    terms in both documents get idf 1, terms in only one get ln(3/2) + 1.
+    """
+    single_idf = math.log(3 / 2) + 1
+    
+    def norm(counts, other):
+        return math.sqrt(sum(
+            (count * (1.0 if term in other else single_idf)) ** 2
+            for term, count in counts.items()
+        ))
+    
+    denominator = norm(resume_counts, job_counts) * norm(job_counts, resume_counts)
+    if not denominator:
+        return 0.0
+    dot = sum(count * job_counts[term] for term, count in resume_counts.items() if term in job_counts)
+    return dot / denominator
+
+@timed('tfidf')
+def score_similarities(resume_counts_list, job_counts):
+    """Score resumes against a job with the corpus TF-IDF model when one is built.
+
+    Until ``manage.py build_corpus`` has produced a model, fall back to the
+    per-pair TF-IDF.
+    """
+    model = get_corpus_model()
+    if model is None:
+        return [_tfidf_similarity(resume_counts, job_counts) for resume_counts in resume_counts_list]
+    return [float(score) for score in model.similarities(resume_counts_list, job_counts)]
+
+def prepare_job_description(job_description):
+    """Preprocess a job description into the keyword and term tables scoring needs"""
+    return {
+        'keywords': dict(extract_keywords(job_description)),
+        'term_counts': _term_counts(job_description),
+    }
+
+def normalize_job_description(job_description):
+    """Collapse whitespace so trivially different pastes of a posting match"""
+    return ' '.join(job_description.split())
+
+def job_description_hash(job_description):
+    """Return the SHA-256 hex digest of the normalized job description"""
+    return hashlib.sha256(normalize_job_description(job_description).encode('utf-8')).hexdigest()
+
+def get_job_profile(job_description):
+    """Return the preprocessed job description, prepared from its normalized text.
+
+    Request handlers read profiles stored on JobPosting rows, so this only
+    runs the first time a posting is seen or after an analyzer upgrade.
+    """
+    return prepare_job_description(normalize_job_description(job_description))
+
+def _as_job_profile(job_description):
+    """Accept raw job description text or an already prepared profile"""
+    if isinstance(job_description, dict):
+        return job_description
+    return get_job_profile(job_description)
+
 def analyze_resume(resume_text, job_description):
     """Analyze resume against job description and return feedback"""
-    # Extract keywords from both documents
+    job = _as_job_profile(job_description)
     resume_keywords = extract_keywords(resume_text)
-    job_keywords = extract_keywords(job_description)
+    similarity_score, = score_similarities([_term_counts(resume_text)], job['term_counts'])
     
-    # Calculate keyword match score
-    common_keywords = set(resume_keywords) & set(job_keywords)
-    keyword_match_score = len(common_keywords) / len(job_keywords) if job_keywords else 0
+    return _build_feedback(resume_keywords, similarity_score, job)
+
+def extract_features(texts, batch_size=32, n_process=1):
+    """Yield (keywords, term counts) for each text, streaming them through nlp.pipe"""
+    docs = get_nlp().pipe(
+        ((text, text) for text in texts),
+        as_tuples=True,
+        batch_size=batch_size,
+        n_process=n_process,
+    )
+    # Time only the work done here, not the caller's between documents; the
+    # first document of each spaCy batch carries that batch's processing
+    start = time.perf_counter()
+    for doc, text in docs:
+        features = _keywords_from_doc(doc), _term_counts(text)
+        observe('nlp', time.perf_counter() - start)
+        yield features
+        start = time.perf_counter()
+
+def analyze_features(features, job_description):
+    """Score already extracted (keywords, term counts) pairs against a job description.
+
+    With features from extract_features this is the batch form of
+    analyze_resume: the job is prepared once and the feedback dicts match.
+    """
+    job = _as_job_profile(job_description)
+    resume_keywords = [keywords for keywords, _ in features]
     
-    # Calculate semantic similarity
-    vectorizer = TfidfVectorizer()
-    documents = [resume_text, job_description]
-    tfidf_matrix = vectorizer.fit_transform(documents)
-    similarity_score = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+    # One sparse matrix product scores the whole batch
+    similarity_scores = score_similarities([term_counts for _, term_counts in features], job['term_counts'])
     
+    return [
+        _build_feedback(keywords, similarity_score, job)
+        for keywords, similarity_score in zip(resume_keywords, similarity_scores)
+    ]
+
+def keyword_coverage(resume_keywords, job_keywords):
+    """Match a resume's keyword table against a job's in one pass over the job keywords.
+
+    Returns (matched, missing, coverage): the job keywords the resume has and
+    lacks, in the order the job first mentions them, and the share of the
+    job's keyword occurrences the matched ones account for, so keywords a
+    posting repeats weigh more.
+    """
+    matched, missing = [], []
+    matched_weight = total_weight = 0
+    for keyword, weight in job_keywords.items():
+        total_weight += weight
+        if keyword in resume_keywords:
+            matched.append(keyword)
+            matched_weight += weight
+        else:
+            missing.append(keyword)
+    return matched, missing, matched_weight / total_weight if total_weight else 0
+
+def _build_feedback(resume_keywords, similarity_score, job):
+    """Score a resume against a preprocessed job description"""
+    matched, missing, keyword_match_score = keyword_coverage(resume_keywords, job['keywords'])
     # Calculate ATS Score as a weighted average of keyword match and semantic similarity
     ats_score = round((0.6 * keyword_match_score + 0.4 * similarity_score) * 100, 2)
     
     # Generate suggestions based on analysis
     suggestions = []
-    if len(common_keywords) < len(job_keywords) * 0.6:
+    if keyword_match_score < 0.6:
         suggestions.append("Add more relevant keywords from the job description")
     if similarity_score < 0.6:
         suggestions.append("Improve semantic similarity by using more relevant terminology")
-    if len(common_keywords) < 5:
+    if len(matched) < 5:
         suggestions.append("Include more specific industry-related terms")
     
     # Generate feedback
     feedback = {
         'ats_score': {
             'score': ats_score,
-            'rating': 'Good' if ats_score >= 70 else ('Fair' if ats_score >= 50 else 'Needs Improvement')
+            'rating': ats_rating(ats_score)
         },
         'keyword_match': {
             'score': round(keyword_match_score * 100, 2),
-            'matched_keywords': list(common_keywords),
-            'missing_keywords': list(set(job_keywords) - set(resume_keywords))
+            'matched_keywords': matched,
+            'missing_keywords': missing
         },
         'semantic_similarity': {
             'score': round(similarity_score * 100, 2),
-            'description': 'High similarity indicates good match between resume and job description'
+            'description': SIMILARITY_DESCRIPTION
         },
         'suggestions': suggestions,
-        'missing_keywords': list(set(job_keywords) - set(resume_keywords))
+        'missing_keywords': missing
     }
     
     return feedback
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import zipfile
+import zlib
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .cache import store_resumes
+from .pipeline import analyze_stored_resumes
+from .uploads import parse_source, sniff_kind
+
+def _skipped(name):
+    # Folders and the metadata macOS and editors add when zipping
+    parts = name.split('/')
+    return name.endswith('/') or '__MACOSX' in parts or os.path.basename(name).startswith('.')
+
+def iter_zip_entries(source):
+    """Yield (name, data, error) for each file in a zip archive, reading one entry at a time.
+
+    Nothing is extracted to disk. Entries are checked against the ZIP_MAX_*
+    limits before being decompressed, and never read past ZIP_MAX_ENTRY_SIZE
+    since the sizes an archive declares can lie. Rejected entries come with
+    data None and the reason in error.
+    """
+    with zipfile.ZipFile(source) as archive:
+        count = 0
+        total = 0
+        for info in archive.infolist():
+            name = info.filename
+            if _skipped(name):
+                continue
+
+            count += 1
+            if count > settings.ZIP_MAX_ENTRIES:
+                yield name, None, f'Archive holds more than {settings.ZIP_MAX_ENTRIES} files; the rest were skipped'
+                return
+            if info.file_size > settings.ZIP_MAX_ENTRY_SIZE:
+                yield name, None, f'File is larger than {settings.ZIP_MAX_ENTRY_SIZE} bytes'
+                continue
+            if info.file_size > settings.ZIP_MAX_RATIO * max(info.compress_size, 1):
+                yield name, None, f'File is compressed more than {settings.ZIP_MAX_RATIO} times'
+                continue
+            if total + info.file_size > settings.ZIP_MAX_TOTAL_SIZE:
+                yield name, None, f'Archive expands to more than {settings.ZIP_MAX_TOTAL_SIZE} bytes; the rest were skipped'
+                return
+
+            try:
+                with archive.open(info) as entry:
+                    data = entry.read(settings.ZIP_MAX_ENTRY_SIZE + 1)
+            except (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError) as e:
+                # Corrupt, encrypted or using an unsupported compression method
+                yield name, None, f'Could not read file: {str(e)}'
+                continue
+            if len(data) > settings.ZIP_MAX_ENTRY_SIZE:
+                yield name, None, f'File is larger than {settings.ZIP_MAX_ENTRY_SIZE} bytes'
+                continue
+
+            total += len(data)
+            yield name, data, None
+
+def ingest_zip(source, job_posting, batch_size=None):
+    """Store and analyze every resume in a zip archive against a job posting.
+
+    Entries are deduplicated by content hash, then stored and analyzed
+    batch_size at a time, so only one batch of entries is held in memory.
+    Returns (results, errors, duplicates): results hold the entry name,
+    Resume, AnalysisResult and feedback of each analyzed entry, errors a
+    {'file', 'error'} dict per failed entry and duplicates a
+    {'file', 'duplicate_of'} dict per entry skipped as a copy of another.
+    """
+    batch_size = batch_size or settings.ANALYZER_BATCH_SIZE
+    results, errors, duplicates = [], [], []
+    seen = {}
+    batch = []
+
+    def flush():
+        stored, store_errors = store_resumes(batch)
+        errors.extend(store_errors)
+        outcomes = analyze_stored_resumes(
+            [resume for _, resume in stored],
+            job_posting,
+            sources=[parse_source(upload, resume) for upload, resume in stored],
+        )
+        for (upload, resume), outcome in zip(stored, outcomes):
+            if 'error' in outcome:
+                errors.append({'file': upload.name, 'error': outcome['error']})
+                continue
+            results.append({
+                'file': upload.name,
+                'resume': resume,
+                'analysis': outcome['analysis'],
+                'feedback': outcome['feedback'],
+            })
+        batch.clear()
+
+    try:
+        for name, data, error in iter_zip_entries(source):
+            if error is not None:
+                errors.append({'file': name, 'error': error})
+                continue
+
+            content_hash = hashlib.sha256(data).hexdigest()
+            if content_hash in seen:
+                duplicates.append({'file': name, 'duplicate_of': seen[content_hash]})
+                continue
+            seen[content_hash] = name
+
+            kind = sniff_kind(data[:2048])
+            if kind is None:
+                errors.append({'file': name, 'error': 'Unsupported file type; expected a PDF or DOCX file'})
+                continue
+
+            # Stored under its own base name; errors and results report the
+            # full path inside the archive
+            upload = ContentFile(data, name=name)
+            upload.content_hash = content_hash
+            upload.resume_kind = kind
+            batch.append(upload)
+            if len(batch) >= batch_size:
+                flush()
+    except zipfile.BadZipFile as e:
+        errors.append({'file': None, 'error': f'Invalid zip archive: {str(e)}'})
+
+    if batch:
+        flush()
+    return results, errors, duplicates
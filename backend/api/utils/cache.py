@@ -0,0 +1,156 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from ..models import Resume
+from .metrics import timed
+from .parser import PARSER_VERSION
+
+PARSE_CACHE_PREFIX = 'parse_cache'
+
+def _parse_cache():
+    return caches[settings.PARSE_CACHE_ALIAS]
+
+def _count(name):
+    """Increment a shared counter so every worker contributes to the stats"""
+    cache = _parse_cache()
+    key = f'{PARSE_CACHE_PREFIX}:{name}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+def hash_file(file):
+    """Return the SHA-256 hex digest of an uploaded file"""
+    if getattr(file, 'content_hash', None):
+        # Already hashed while the upload streamed in
+        return file.content_hash
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def _text_key(content_hash):
+    # Text from an older parser version is never served
+    return f'{PARSE_CACHE_PREFIX}:text:v{PARSER_VERSION}:{content_hash}'
+
+def get_cached_text(content_hash):
+    """Return previously extracted text for a file hash, or None on a miss"""
+    cache = _parse_cache()
+    text = cache.get(_text_key(content_hash))
+
+    if text is None:
+        # Fall back to the text stored alongside an earlier upload of the same bytes
+        resume = (Resume.objects.filter(content_hash=content_hash, parser_version=PARSER_VERSION)
+                  .exclude(extracted_text='')
+                  .only('extracted_text')
+                  .first())
+        if resume is not None:
+            text = resume.extracted_text
+            cache_text(content_hash, text)
+
+    _count('hits' if text is not None else 'misses')
+    return text
+
+def cache_text(content_hash, text):
+    """Store extracted text for a file hash in the parse cache"""
+    _parse_cache().set(_text_key(content_hash), text,
+                       timeout=settings.PARSE_CACHE_TIMEOUT)
+
+def parse_cache_stats():
+    """Return parse cache hit/miss counters"""
+    cache = _parse_cache()
+    hits = cache.get(f'{PARSE_CACHE_PREFIX}:hits', 0)
+    misses = cache.get(f'{PARSE_CACHE_PREFIX}:misses', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0.0,
+    }
+
+@timed('save')
+def store_resume(file):
+    """Save an uploaded resume, reusing the stored file and text of identical uploads.
+
+    Returns the new Resume and its cached text, or None if it still needs parsing.
+    """
+    content_hash = hash_file(file)
+    existing = Resume.objects.filter(content_hash=content_hash).only('file').first()
+
+    if existing is None:
+        _count('misses')
+        return Resume.objects.create(file=file, content_hash=content_hash), None
+
+    # Point the new row at the file already on disk instead of writing a copy
+    text = get_cached_text(content_hash)
+    resume = Resume.objects.create(
+        file=existing.file.name,
+        content_hash=content_hash,
+        extracted_text=text or '',
+        parser_version=PARSER_VERSION if text is not None else 0,
+    )
+    return resume, text
+
+@timed('save')
+def store_resumes(files):
+    """Save a batch of uploads with one bulk insert, reusing identical stored files.
+
+    Returns the (upload, Resume) pairs saved, in upload order, and an
+    {'file', 'error'} dict per upload that could not be saved or was
+    rejected while streaming in. Resumes of files seen before carry their
+    cached text.
+    """
+    errors = []
+    hashed = []
+    for file in files:
+        if getattr(file, 'upload_error', None):
+            errors.append({'file': file.name, 'error': file.upload_error})
+            continue
+        try:
+            hashed.append((file, hash_file(file)))
+        except Exception as e:
+            errors.append({'file': file.name, 'error': str(e)})
+
+    stored_names = dict(Resume.objects.filter(content_hash__in={content_hash for _, content_hash in hashed})
+                        .values_list('content_hash', 'file'))
+    file_field = Resume._meta.get_field('file')
+
+    stored = []
+    for file, content_hash in hashed:
+        name = stored_names.get(content_hash)
+        text = None
+        if name is None:
+            # Written before the insert; a duplicate later in the batch reuses it
+            try:
+                name = default_storage.save(file_field.generate_filename(None, os.path.basename(file.name)), file)
+            except Exception as e:
+                errors.append({'file': file.name, 'error': str(e)})
+                continue
+            stored_names[content_hash] = name
+            _count('misses')
+        else:
+            text = get_cached_text(content_hash)
+        stored.append((file, Resume(
+            file=name,
+            content_hash=content_hash,
+            extracted_text=text or '',
+            parser_version=PARSER_VERSION if text is not None else 0,
+        )))
+
+    with transaction.atomic():
+        Resume.objects.bulk_create([resume for _, resume in stored])
+    return stored, errors
+
+def remember_text(resume, text):
+    """Persist freshly extracted text on the resume and in the parse cache"""
+    resume.extracted_text = text
+    resume.parser_version = PARSER_VERSION
+    resume.save(update_fields=['extracted_text', 'parser_version'])
+    cache_text(resume.content_hash, text)
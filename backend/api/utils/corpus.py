@@ -0,0 +1,138 @@
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+
+_analyzer = None
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+def tokenize(text):
+    """Split text into the terms TfidfVectorizer would count"""
+    global _analyzer
+    if _analyzer is None:
+        # scikit-learn is slow to import, so defer it until text is first scored
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        _analyzer = TfidfVectorizer().build_analyzer()
+    return _analyzer(text)
+
+class CorpusModel:
+    """Vocabulary and document frequencies fitted over the stored resumes and postings.
+
+    Unlike a TfidfVectorizer refit per request, the model is fitted once and
+    updated incrementally, so scoring only needs a transform and a sparse dot
+    product. IDF uses the same smoothed formula as scikit-learn.
+    """
+
+    def __init__(self, terms=None, document_frequency=None, n_documents=0,
+                 last_resume_id=0, last_posting_id=0):
+        self.terms = list(terms or [])
+        self.vocabulary = {term: index for index, term in enumerate(self.terms)}
+        self.document_frequency = np.zeros(len(self.terms), dtype=np.int64)
+        if document_frequency is not None:
+            self.document_frequency[:] = document_frequency
+        self.n_documents = n_documents
+        # Highest ids already counted, so an incremental fit only reads new rows
+        self.last_resume_id = last_resume_id
+        self.last_posting_id = last_posting_id
+        self._idf = None
+
+    def partial_fit(self, texts):
+        """Add documents to the corpus statistics"""
+        counts = {}
+        for text in texts:
+            for term in set(tokenize(text)):
+                counts[term] = counts.get(term, 0) + 1
+            self.n_documents += 1
+
+        new_terms = [term for term in counts if term not in self.vocabulary]
+        for term in new_terms:
+            self.vocabulary[term] = len(self.terms)
+            self.terms.append(term)
+        if new_terms:
+            self.document_frequency = np.concatenate([
+                self.document_frequency, np.zeros(len(new_terms), dtype=np.int64)
+            ])
+
+        for term, count in counts.items():
+            self.document_frequency[self.vocabulary[term]] += count
+        self._idf = None
+        return self
+
+    @property
+    def idf(self):
+        if self._idf is None:
+            self._idf = np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1
+        return self._idf
+
+    def transform_counts(self, term_counts_list):
+        """Turn term-count tables into an L2-normalized TF-IDF matrix (one row each)"""
+        from scipy import sparse
+        from sklearn.preprocessing import normalize
+
+        rows, cols, values = [], [], []
+        for row, term_counts in enumerate(term_counts_list):
+            for term, count in term_counts.items():
+                index = self.vocabulary.get(term)
+                if index is not None:
+                    rows.append(row)
+                    cols.append(index)
+                    values.append(count)
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float64), (rows, cols)),
+            shape=(len(term_counts_list), len(self.terms)),
+        )
+        return normalize(matrix.multiply(self.idf).tocsr())
+
+    def similarities(self, resume_counts_list, job_counts):
+        """Cosine similarity of every resume against one job, as one sparse product"""
+        resumes = self.transform_counts(resume_counts_list)
+        job = self.transform_counts([job_counts])
+        return np.asarray((resumes @ job.T).todense()).ravel()
+
+    def save(self, path):
+        """Write the model atomically so readers never see a partial file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                terms=np.array(self.terms, dtype=str),
+                document_frequency=self.document_frequency,
+                meta=np.array([self.n_documents, self.last_resume_id, self.last_posting_id], dtype=np.int64),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            n_documents, last_resume_id, last_posting_id = (int(value) for value in data['meta'])
+            return cls(
+                terms=data['terms'].tolist(),
+                document_frequency=data['document_frequency'],
+                n_documents=n_documents,
+                last_resume_id=last_resume_id,
+                last_posting_id=last_posting_id,
+            )
+
+def get_corpus_model():
+    """Return the fitted corpus model, reloading it when the file on disk changes.
+
+    Returns None until a model has been built with ``manage.py build_corpus``.
+    """
+    global _model, _model_mtime
+    path = settings.CORPUS_MODEL_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _model_lock:
+        if mtime != _model_mtime:
+            _model = CorpusModel.load(path)
+            _model_mtime = mtime
+        return _model
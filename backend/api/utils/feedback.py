@@ -0,0 +1,10 @@
+# Pieces of the feedback dict that are derived from scores rather than stored
+
+SIMILARITY_DESCRIPTION = 'High similarity indicates good match between resume and job description'
+
+# Feedback keys rebuilt from AnalysisResult columns by to_feedback()
+DERIVED_KEYS = ('ats_score', 'keyword_match', 'semantic_similarity', 'missing_keywords')
+
+def ats_rating(ats_score):
+    """Return the rating label shown for an ATS score"""
+    return 'Good' if ats_score >= 70 else ('Fair' if ats_score >= 50 else 'Needs Improvement')
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from ..models import AnalysisJob, AnalysisJobItem
+from .pipeline import analyze_stored_resumes
+
+def enqueue_resumes(uploads, job_posting):
+    """Create an analysis job for stored resumes, given as (file name, resume) pairs"""
+    with transaction.atomic():
+        job = AnalysisJob.objects.create(job_posting=job_posting)
+        AnalysisJobItem.objects.bulk_create([
+            AnalysisJobItem(job=job, resume=resume, file_name=file_name)
+            for file_name, resume in uploads
+        ])
+    return job
+
+def claim_items(worker, limit):
+    """Claim up to limit queued items for this worker.
+
+    Items left RUNNING by a worker that died are reclaimed once their lease
+    expires. Rows are locked with SKIP LOCKED where the database supports it;
+    the conditional update keeps claims exclusive on SQLite, which does not.
+    """
+    lease_expired = timezone.now() - timedelta(seconds=settings.ANALYSIS_JOB_LEASE)
+    claimable = Q(status='PENDING') | Q(status='RUNNING', claimed_at__lt=lease_expired)
+
+    with transaction.atomic():
+        ids = list(AnalysisJobItem.objects.select_for_update(skip_locked=True)
+                   .filter(claimable)
+                   .order_by('id')
+                   .values_list('id', flat=True)[:limit])
+        AnalysisJobItem.objects.filter(claimable, id__in=ids).update(
+            status='RUNNING',
+            worker=worker,
+            claimed_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+
+    return list(AnalysisJobItem.objects.filter(id__in=ids, worker=worker, status='RUNNING')
+                .select_related('resume', 'job__job_posting'))
+
+def process_items(items):
+    """Analyze claimed items, one batch per job posting, and record each outcome.
+
+    An outcome is only written while the item is still leased to the worker
+    that claimed it. If the lease expired and another worker reclaimed the
+    item meanwhile, the outcome is dropped along with its analysis, so the
+    other worker's result stands. Returns the items whose outcome was recorded.
+    """
+    by_posting = {}
+    for item in items:
+        if item.attempts > settings.ANALYSIS_JOB_MAX_ATTEMPTS:
+            item.status = 'FAILED'
+            item.error = f'Gave up after {settings.ANALYSIS_JOB_MAX_ATTEMPTS} attempts'
+        else:
+            by_posting.setdefault(item.job.job_posting_id, []).append(item)
+
+    for group in by_posting.values():
+        try:
+            outcomes = analyze_stored_resumes([item.resume for item in group], group[0].job.job_posting)
+        except Exception as e:
+            outcomes = [{'error': str(e)}] * len(group)
+
+        for item, outcome in zip(group, outcomes):
+            item.status = 'FAILED' if 'error' in outcome else 'DONE'
+            item.error = outcome.get('error', '')
+            item.analysis = outcome.get('analysis')
+
+    recorded = []
+    now = timezone.now()
+    for item in items:
+        with transaction.atomic():
+            updated = AnalysisJobItem.objects.filter(
+                id=item.id, worker=item.worker, status='RUNNING', claimed_at=item.claimed_at,
+            ).update(status=item.status, error=item.error, analysis=item.analysis, updated_at=now)
+            if not updated and item.analysis is not None:
+                item.analysis.delete()
+                item.analysis = None
+        if updated:
+            item.updated_at = now
+            recorded.append(item)
+    return recorded
+
+def job_status(job):
+    """Summarize a job's progress from its item counts"""
+    counts = {status: 0 for status, _ in AnalysisJobItem.STATUS_CHOICES}
+    counts.update(job.items.values_list('status').annotate(count=Count('id')).order_by())
+
+    if counts['PENDING'] + counts['RUNNING'] == 0:
+        state = 'DONE'
+    elif counts['DONE'] + counts['FAILED'] + counts['RUNNING'] == 0:
+        state = 'PENDING'
+    else:
+        state = 'RUNNING'
+    return state, counts
@@ -0,0 +1,125 @@
+import contextvars
+import functools
+import threading
+import time
+from contextlib import ContextDecorator, contextmanager
+
+# Upper bounds in seconds; each histogram is a fixed array of counts, so memory
+# stays constant however many observations are recorded
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+# Stage durations of the request being served, for its Server-Timing header
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+class Histogram:
+    """Cumulative-bucket duration histogram, as Prometheus exposes them"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        """Return (cumulative bucket counts, sum, count)"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+def get_histogram(stage):
+    with _histograms_lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        return histogram
+
+def observe(stage, seconds):
+    """Record a stage duration in its histogram and in the current request's timings"""
+    get_histogram(stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+class timed(ContextDecorator):
+    """Time a block or function as a named stage.
+
+    Usable as ``with timed('parse'):`` or as ``@timed('parse')``.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._starts = threading.local()
+
+    def __enter__(self):
+        # A decorated function may run in several threads at once
+        self._starts.__dict__.setdefault('stack', []).append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self._starts.stack.pop())
+        return False
+
+@contextmanager
+def collect_timings():
+    """Collect the stage durations recorded inside the block into a dict"""
+    timings = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+def server_timing(view):
+    """Add a Server-Timing header listing the stages a view spent its time in"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        with collect_timings() as timings:
+            response = view(*args, **kwargs)
+        # Streamed responses have sent their headers before the stages run
+        if not getattr(response, 'streaming', False):
+            entries = [f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in timings.items()]
+            entries.append(f'total;dur={(time.perf_counter() - start) * 1000:.1f}')
+            response['Server-Timing'] = ', '.join(entries)
+        return response
+    return wrapper
+
+def render_metrics():
+    """Render every stage histogram in the Prometheus text exposition format.
+
+    Each server process keeps its own histograms, so this covers the process
+    that served the scrape.
+    """
+    lines = [
+        '# HELP ats_stage_duration_seconds Time spent in each processing stage.',
+        '# TYPE ats_stage_duration_seconds histogram',
+    ]
+    with _histograms_lock:
+        stages = sorted(_histograms.items())
+    for stage, histogram in stages:
+        cumulative, total, count = histogram.snapshot()
+        for bound, value in zip(histogram.buckets + ('+Inf',), cumulative):
+            lines.append(f'ats_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {value}')
+        lines.append(f'ats_stage_duration_seconds_sum{{stage="{stage}"}} {total}')
+        lines.append(f'ats_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+    return '\n'.join(lines) + '\n'
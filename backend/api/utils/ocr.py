@@ -0,0 +1,107 @@
+import io
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytesseract
+from django.conf import settings
+from pdf2image import convert_from_bytes, convert_from_path
+
+from .metrics import observe
+
+def available_cores():
+    """Number of CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+# Read once at import: every OCR call shares one pool of this size
+OCR_POOL_SIZE = settings.OCR_MAX_WORKERS or available_cores()
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_ocr_pool():
+    """Return the process-wide OCR thread pool.
+
+    Each OCR call runs tesseract as a subprocess, so threads are enough to
+    keep several pages in flight. The pool has OCR_POOL_SIZE threads, taken
+    from OCR_MAX_WORKERS when this module is imported; changing the setting
+    later has no effect. It is rebuilt, at the same size, after a fork
+    because its threads do not survive into the child.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(max_workers=OCR_POOL_SIZE, thread_name_prefix='ocr')
+            _pool_pid = os.getpid()
+        return _pool
+
+def image_to_string(image, omp_threads=1, timeout=None):
+    """OCR a PIL image, handing it to tesseract as an in-memory PNG on stdin.
+
+    Unlike pytesseract.image_to_string this writes no temporary files, and it
+    caps tesseract's own OpenMP threads so concurrent pages do not oversubscribe
+    the CPU.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+
+    env = dict(os.environ, OMP_THREAD_LIMIT=str(omp_threads))
+    result = subprocess.run(
+        [pytesseract.pytesseract.tesseract_cmd, 'stdin', 'stdout'],
+        input=buffer.getvalue(),
+        capture_output=True,
+        env=env,
+        timeout=timeout,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Tesseract failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout.decode('utf-8')
+
+def ocr_pdf_page(file_path, page_number, dpi=200, omp_threads=1, timeout=None):
+    """Rasterize and OCR a single PDF page, given the PDF's path or its bytes.
+
+    Returns the text and a timing dict for the page.
+    """
+    start = time.perf_counter()
+    convert = convert_from_bytes if isinstance(file_path, bytes) else convert_from_path
+    images = convert(file_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    rasterized = time.perf_counter()
+    text = "".join(image_to_string(image, omp_threads, timeout) for image in images)
+    finished = time.perf_counter()
+    return text, {
+        'page': page_number,
+        'rasterize_seconds': round(rasterized - start, 4),
+        'ocr_seconds': round(finished - rasterized, 4),
+    }
+
+def ocr_pdf_pages(file_path, page_numbers, dpi=200, timeout=None):
+    """Start OCR of several PDF pages concurrently in the shared pool.
+
+    Returns a dict of page number to future; each future resolves to
+    (text, timing) from ocr_pdf_page.
+    """
+    # With several pages in flight, one OpenMP thread per tesseract keeps the
+    # total at roughly one thread per core
+    omp_threads = 1 if OCR_POOL_SIZE > 1 else available_cores()
+    pool = get_ocr_pool()
+    return {
+        page_number: pool.submit(ocr_pdf_page, file_path, page_number, dpi, omp_threads, timeout)
+        for page_number in page_numbers
+    }
+
+def observe_ocr_timings(timings):
+    """Record per-page timings from ocr_pdf_page in the rasterize and ocr stage metrics.
+
+    Pages are OCRed in pool threads, often of a parse worker process, so the
+    timings are recorded by whoever collects them, in the thread serving the
+    request.
+    """
+    for timing in timings:
+        observe('rasterize', timing['rasterize_seconds'])
+        observe('ocr', timing['ocr_seconds'])
@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .metrics import timed
+from .ocr import observe_ocr_timings
+from .parser import parse_resume
+
+# Workers are started from a clean server process, not forked from the
+# threaded web server: a fork could copy a lock another thread holds and
+# hang the worker until its timeout. The server preloads the parsers once.
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    _mp_context = multiprocessing.get_context('forkserver')
+    _mp_context.set_forkserver_preload([__name__])
+else:
+    _mp_context = multiprocessing.get_context('spawn')
+
+# Shared by every request in this process, so concurrent uploads together
+# run at most PARSER_MAX_WORKERS parse processes
+_worker_slots = threading.BoundedSemaphore(settings.PARSER_MAX_WORKERS)
+
+def _parse_worker(source):
+    """Parse a single resume inside a worker process"""
+    file_path, kind = source if isinstance(source, tuple) else (source, None)
+    # Returned with the text, since metrics recorded in this process are never scraped
+    ocr_timings = []
+    try:
+        return {'text': parse_resume(file_path, kind, ocr_timings), 'error': None, 'ocr_timings': ocr_timings}
+    except Exception as e:
+        return {'text': None, 'error': str(e), 'ocr_timings': ocr_timings}
+
+def _error(message):
+    return {'text': None, 'error': message}
+
+def _report_pid(pids):
+    """Pool initializer: tell the parent which process to kill if this worker gets stuck"""
+    pids.put(os.getpid())
+
+def _terminate(executor, pids):
+    """Shut the pool down and kill its workers, which may be stuck"""
+    executor.shutdown(wait=False, cancel_futures=True)
+    while not pids.empty():
+        try:
+            os.kill(pids.get(), signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+def _acquire_slots(wanted):
+    """Wait for one worker slot, then take up to wanted - 1 more that are free.
+
+    Only the first slot is waited for, so requests never hold slots while
+    waiting for each other, and a busy server runs smaller pools.
+    """
+    _worker_slots.acquire()
+    slots = 1
+    while slots < wanted and _worker_slots.acquire(blocking=False):
+        slots += 1
+    return slots
+
+def _release_slots(slots):
+    for _ in range(slots):
+        _worker_slots.release()
+
+def _parse_batch(file_paths, queue, results, max_workers, timeout):
+    """Run queued indexes through one pool until it finishes, times out or crashes.
+
+    Returns the indexes that still need a pool and the indexes that were in
+    flight when a worker died.
+    """
+    queue = list(queue)
+    in_flight = {}
+    max_workers = _acquire_slots(min(max_workers, len(queue)))
+    pids = _mp_context.SimpleQueue()
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=_mp_context,
+                                   initializer=_report_pid, initargs=(pids,))
+    try:
+        while queue or in_flight:
+            # Keep at most max_workers files submitted so a deadline starts when work does
+            while queue and len(in_flight) < max_workers:
+                index = queue.pop(0)
+                future = executor.submit(_parse_worker, file_paths[index])
+                in_flight[future] = (index, time.monotonic() + timeout)
+
+            next_deadline = min(deadline for _, deadline in in_flight.values())
+            done, _ = wait(in_flight, timeout=max(0, next_deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+
+            crashed = []
+            for future in done:
+                index, _ = in_flight.pop(future)
+                try:
+                    results[index] = future.result()
+                except BrokenProcessPool:
+                    crashed.append(index)
+            if crashed:
+                # Every file still running died with the pool, so any of them may be the cause
+                _terminate(executor, pids)
+                return queue, crashed + [i for i, _ in in_flight.values()]
+
+            now = time.monotonic()
+            expired = [f for f, (_, deadline) in in_flight.items() if deadline <= now]
+            if expired:
+                for future in expired:
+                    index, _ = in_flight.pop(future)
+                    results[index] = _error(f"Timed out after {timeout} seconds")
+                # A stuck worker cannot be cancelled, so restart the pool for the rest
+                _terminate(executor, pids)
+                return [i for i, _ in in_flight.values()] + queue, []
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        pids.close()
+        _release_slots(max_workers)
+
+    return [], []
+
+@timed('parse_batch')
+def parse_resumes(file_paths, max_workers=2, timeout=60):
+    """Parse resume files in a bounded process pool.
+
+    Each entry is a path, or a (path or bytes, kind) pair as parse_resume
+    takes them. The pool gets at most max_workers of the PARSER_MAX_WORKERS
+    processes shared by all requests, and fewer while other requests hold
+    them. Returns one {'text', 'error'} dict per entry, in input order. A file that
+    times out or crashes its worker is reported as an error instead of holding
+    up the rest of the batch. Per-page OCR timings from the workers are
+    recorded in the calling thread's metrics and Server-Timing stages.
+    """
+    results = [None] * len(file_paths)
+    queue = list(range(len(file_paths)))
+
+    while queue:
+        queue, suspects = _parse_batch(file_paths, queue, results, max_workers, timeout)
+        # Retry files caught in a crash one at a time to find the one responsible
+        for index in suspects:
+            _, crashed = _parse_batch(file_paths, [index], results, 1, timeout)
+            if crashed:
+                results[index] = _error("Worker process crashed while parsing")
+
+    for result in results:
+        observe_ocr_timings(result.pop('ocr_timings', []))
+    return results
@@ -1,47 +1,176 @@
+import io
+import logging
+import mmap
 import os
+from contextlib import contextmanager
+
 import docx
 import PyPDF2
-from pdf2image import convert_from_path
-import pytesseract
+from django.conf import settings
+
+from .metrics import timed
+from .ocr import ocr_pdf_pages
+
+# Bump whenever extraction changes; cached text from an older version is re-parsed
+PARSER_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+class MemoryReader(io.RawIOBase):
+    """Read-only, seekable file over any buffer (memoryview, bytearray, mmap) without copying it"""
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast('B')
+        self._position = 0
+
+    def readable(self):
+        return True
 
-def parse_resume(file_path):
-    """Parse resume content from various file formats"""
-    file_extension = os.path.splitext(file_path)[1].lower()
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        end = min(self._position + len(buffer), len(self._view))
+        count = end - self._position
+        buffer[:count] = self._view[self._position:end]
+        self._position = end
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+@contextmanager
+def open_source(source):
+    """Open a resume given as a path, bytes, memoryview or binary file object for reading.
+
+    Bytes are wrapped in a BytesIO, which shares rather than copies them, and
+    other buffers are read in place. Local files of PARSER_MMAP_THRESHOLD
+    bytes or more are memory-mapped; file objects are used as they are.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            if os.fstat(file.fileno()).st_size >= settings.PARSER_MMAP_THRESHOLD:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                        MemoryReader(mapped) as reader:
+                    yield reader
+            else:
+                yield file
+    elif isinstance(source, bytes):
+        yield io.BytesIO(source)
+    elif isinstance(source, (memoryview, bytearray, mmap.mmap)):
+        with MemoryReader(source) as reader:
+            yield reader
+    else:
+        yield source
+
+def sniff_format(head):
+    """Identify a resume format ('pdf' or 'docx') from a file's leading magic bytes"""
+    # PDF readers accept the header anywhere in the first kilobyte
+    if b'%PDF-' in head[:1024]:
+        return 'pdf'
+    # DOCX files are zip archives
+    if head.startswith(b'PK\x03\x04'):
+        return 'docx'
+    return None
+
+def detect_format(source):
+    """Sniff the format of a resume source without moving a file object's position"""
+    with open_source(source) as file:
+        position = file.tell()
+        head = file.read(1024)
+        file.seek(position)
+    return sniff_format(head)
+
+@timed('parse')
+def parse_resume(file_path, kind=None, timings=None):
+    """Parse resume content from various file formats.
+
+    file_path may be a path, bytes, a memoryview or a binary file object. The
+    format is sniffed from the content unless kind ('pdf' or 'docx') is given.
+    Per-page OCR timings of a PDF are appended to timings when a list is given.
+    """
+    kind = kind or detect_format(file_path)
     
-    if file_extension == '.pdf':
-        return parse_pdf(file_path)
-    elif file_extension == '.docx':
+    if kind == 'pdf':
+        return parse_pdf(file_path, timings)
+    elif kind == 'docx':
         return parse_docx(file_path)
     else:
-        raise ValueError(f"Unsupported file format: {file_extension}")
+        raise ValueError("Unsupported file format: expected a PDF or DOCX file")
 
-def parse_pdf(file_path):
+def parse_pdf(file_path, timings=None):
     """Parse text from PDF file"""
     try:
-        # Try to extract text directly
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            
-            if text.strip():
-                return text
-        
-        # If direct extraction fails, try OCR
-        images = convert_from_path(file_path)
-        text = ""
-        for image in images:
-            text += pytesseract.image_to_string(image)
-        
-        return text
+        return "\n".join(iter_pdf_pages(
+            file_path,
+            dpi=settings.PDF_OCR_DPI,
+            max_pages=settings.PDF_MAX_PAGES,
+            min_chars=settings.PDF_OCR_MIN_CHARS,
+            ocr_timeout=settings.OCR_PAGE_TIMEOUT,
+            timings=timings,
+        ))
     except Exception as e:
         raise Exception(f"Error parsing PDF: {str(e)}")
 
+def iter_pdf_pages(file_path, dpi=200, max_pages=50, min_chars=10, ocr_timeout=None, timings=None):
+    """Yield the text of each PDF page, running OCR only on pages that need it.
+
+    A page whose text layer has fewer than min_chars characters is treated as
+    scanned. Those pages are rasterized one page per task and OCRed
+    concurrently in the shared OCR pool, so mixed scanned/digital documents
+    work and at most OCR_MAX_WORKERS page images are in memory. Pages past
+    max_pages are ignored. If OCR of a page fails or times out (after
+    OCR_PAGE_TIMEOUT), the error is logged and the page keeps its text-layer
+    text. Per-page OCR timings are appended to timings when a list is given.
+    file_path may be any source open_source accepts.
+    """
+    with open_source(file_path) as file:
+        page_texts = _pdf_text_layers(file, max_pages)
+        scanned = [number for number, text in enumerate(page_texts, start=1) if len(text.strip()) < min_chars]
+        
+        # Local files are rasterized straight from disk, anything else from its bytes
+        pdf = file_path
+        if scanned and not isinstance(file_path, (str, os.PathLike, bytes)):
+            file.seek(0)
+            pdf = file.read()
+    ocr_futures = ocr_pdf_pages(pdf, scanned, dpi, ocr_timeout)
+    
+    for page_number, text in enumerate(page_texts, start=1):
+        if page_number in ocr_futures:
+            try:
+                text, timing = ocr_futures[page_number].result()
+            except Exception as e:
+                logger.warning('OCR of PDF page %s failed, keeping its text layer: %s', page_number, e)
+            else:
+                if timings is not None:
+                    timings.append(timing)
+        yield text
+
+def _pdf_text_layers(file, max_pages):
+    """Return the embedded text of the first max_pages pages of an open PDF"""
+    pdf_reader = PyPDF2.PdfReader(file)
+    return [
+        page.extract_text() or ""
+        for page in pdf_reader.pages[:max_pages]
+    ]
+
 def parse_docx(file_path):
     """Parse text from DOCX file"""
     try:
-        doc = docx.Document(file_path)
+        with open_source(file_path) as file:
+            doc = docx.Document(file)
         text = ""
         for paragraph in doc.paragraphs:
             text += paragraph.text + "\n"
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.db import transaction
+
+from ..models import AnalysisResult, Resume
+from .analyzer import ANALYZER_VERSION, analyze_features, extract_features
+from .cache import cache_text
+from .metrics import timed
+from .profiling import record_analysis
+from .search import index_keywords
+from .parallel import parse_resumes
+from .parser import PARSER_VERSION
+
+@timed('db')
+def save_analysis(resume, job_posting, analysis_result):
+    """Store an analyzer feedback dict as an AnalysisResult"""
+    analysis = build_analysis(resume, job_posting, analysis_result)
+    analysis.save()
+    record_analysis(analysis.id)
+    return analysis
+
+def build_analysis(resume, job_posting, analysis_result):
+    """Return an unsaved AnalysisResult for an analyzer feedback dict"""
+    analysis = AnalysisResult(resume=resume, job_posting=job_posting, analyzer_version=ANALYZER_VERSION)
+    analysis.set_feedback(analysis_result)
+    return analysis
+
+def features_stale(resume):
+    """Whether a resume's stored features are missing or from an older analyzer"""
+    return resume.features_version != ANALYZER_VERSION or resume.keywords is None
+
+def resume_features(resumes, batch_size=32, n_process=1, save=True):
+    """Return (keywords, term counts) for each resume from its extracted text.
+
+    Features stored by the current analyzer version are reused; the rest are
+    computed in one spaCy pass, once per distinct file, and set on the
+    resumes so later rescoring can skip NLP entirely. With save=False the
+    caller is responsible for storing the updated resumes.
+    """
+    features = {}
+    stale = {}
+    for resume in resumes:
+        key = resume.content_hash or resume.id
+        if not features_stale(resume):
+            features.setdefault(key, (resume.keywords, resume.term_counts))
+        else:
+            stale.setdefault(key, resume.extracted_text)
+
+    stale = {key: text for key, text in stale.items() if key not in features}
+    for key, (keywords, term_counts) in zip(stale, extract_features(stale.values(), batch_size, n_process)):
+        features[key] = (dict(keywords), dict(term_counts))
+
+    updated = []
+    for resume in resumes:
+        if features_stale(resume):
+            resume.keywords, resume.term_counts = features[resume.content_hash or resume.id]
+            resume.features_version = ANALYZER_VERSION
+            updated.append(resume)
+    if save:
+        with transaction.atomic():
+            Resume.objects.bulk_update(updated, ['keywords', 'term_counts', 'features_version'])
+            index_keywords(updated)
+
+    return [features[resume.content_hash or resume.id] for resume in resumes]
+
+def analyze_stored_resumes(resumes, job_posting, sources=None):
+    """Parse, analyze and save analyses for already stored resumes.
+
+    Resumes without extracted text are parsed in the process pool, once per
+    distinct file. Extracted text, features and the new AnalysisResults are
+    written with bulk queries in a single transaction. Returns one dict per
+    resume, in order, holding either the saved 'analysis' and its 'feedback'
+    or an 'error' message. sources optionally gives, per resume, what to parse
+    instead of its stored file, as parse_resumes takes it.
+    """
+    outcomes = [None] * len(resumes)
+
+    to_parse = {}
+    for index, resume in enumerate(resumes):
+        if not resume.extracted_text:
+            to_parse.setdefault(resume.content_hash or resume.id, []).append(index)
+
+    parse_results = parse_resumes(
+        [sources[indexes[0]] if sources else resumes[indexes[0]].file.path for indexes in to_parse.values()],
+        max_workers=settings.PARSER_MAX_WORKERS,
+        timeout=settings.PARSER_TIMEOUT,
+    )
+    reparsed = []
+    for indexes, parse_result in zip(to_parse.values(), parse_results):
+        for index in indexes:
+            if parse_result['error']:
+                outcomes[index] = {'error': parse_result['error']}
+            else:
+                resumes[index].extracted_text = parse_result['text']
+                resumes[index].parser_version = PARSER_VERSION
+                reparsed.append(resumes[index])
+
+    parsed = [index for index, outcome in enumerate(outcomes) if outcome is None]
+    stale = [resumes[index] for index in parsed if features_stale(resumes[index])]
+    features = resume_features(
+        [resumes[index] for index in parsed],
+        batch_size=settings.ANALYZER_BATCH_SIZE,
+        n_process=settings.ANALYZER_N_PROCESS,
+        save=False,
+    )
+    analysis_results = analyze_features(features, job_posting.profile())
+    analyses = [
+        build_analysis(resumes[index], job_posting, analysis_result)
+        for index, analysis_result in zip(parsed, analysis_results)
+    ]
+
+    with timed('db'), transaction.atomic():
+        Resume.objects.bulk_update(reparsed, ['extracted_text', 'parser_version'])
+        Resume.objects.bulk_update(stale, ['keywords', 'term_counts', 'features_version'])
+        index_keywords(stale)
+        AnalysisResult.objects.bulk_create(analyses)
+
+    for resume in reparsed:
+        cache_text(resume.content_hash, resume.extracted_text)
+    for index, analysis_result, analysis in zip(parsed, analysis_results, analyses):
+        record_analysis(analysis.id)
+        outcomes[index] = {'analysis': analysis, 'feedback': analysis_result}
+
+    return outcomes
@@ -0,0 +1,42 @@
+from django.db import IntegrityError
+
+from ..models import JobPosting
+from .analyzer import ANALYZER_VERSION, get_job_profile, job_description_hash
+
+def get_or_create_posting(description, title=''):
+    """Return the JobPosting for a description, preprocessing it on first sight.
+
+    The description is stored as submitted; only its hash and keyword tables
+    are computed from the whitespace-normalized text.
+    """
+    content_hash = job_description_hash(description)
+    posting = JobPosting.objects.filter(content_hash=content_hash).first()
+    if posting is not None:
+        if title and not posting.title:
+            posting.title = title
+            posting.save(update_fields=['title'])
+        return refresh_posting(posting)
+    
+    profile = get_job_profile(description)
+    try:
+        return JobPosting.objects.create(
+            title=title,
+            description=description,
+            content_hash=content_hash,
+            keywords=profile['keywords'],
+            term_counts=dict(profile['term_counts']),
+            analyzer_version=ANALYZER_VERSION,
+        )
+    except IntegrityError:
+        # Another request stored the same posting first
+        return JobPosting.objects.get(content_hash=content_hash)
+
+def refresh_posting(posting):
+    """Recompute a posting's keyword tables if an older analyzer version produced them"""
+    if posting.analyzer_version != ANALYZER_VERSION:
+        profile = get_job_profile(posting.description)
+        posting.keywords = profile['keywords']
+        posting.term_counts = dict(profile['term_counts'])
+        posting.analyzer_version = ANALYZER_VERSION
+        posting.save(update_fields=['keywords', 'term_counts', 'analyzer_version'])
+    return posting
@@ -0,0 +1,182 @@
+import contextvars
+import cProfile
+import functools
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# The profile collecting analysis ids for the request being served
+_current = contextvars.ContextVar('current_profile', default=None)
+
+def profile_requested(request):
+    """Whether the client asked for a profile by header and may have one.
+
+    The header is ignored unless PROFILE_HEADER is set. Its value must match
+    PROFILE_SECRET when one is configured; otherwise any true value is honored
+    only in DEBUG or for an authenticated staff user.
+    """
+    if not settings.PROFILE_HEADER:
+        return False
+    value = request.headers.get(settings.PROFILE_HEADER, '')
+    if settings.PROFILE_SECRET:
+        return hmac.compare_digest(value.encode(), settings.PROFILE_SECRET.encode())
+    if value.lower() not in ('1', 'true', 'yes'):
+        return False
+    user = getattr(request, 'user', None)
+    return settings.DEBUG or bool(user is not None and user.is_authenticated and user.is_staff)
+
+def record_analysis(analysis_id):
+    """Attach an AnalysisResult id to the profile of the current request, if any"""
+    profile = _current.get()
+    if profile is not None:
+        profile.analysis_ids.append(analysis_id)
+
+class RequestProfile:
+    """cProfile run over one request, saved under the ids of the analyses it produced"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.analysis_ids = []
+        self._token = None
+
+    def start(self):
+        # Raises ValueError if another profiler is already active in this thread
+        self.profiler.enable()
+        self._token = _current.set(self)
+
+    def stop(self):
+        self.profiler.disable()
+        _current.reset(self._token)
+
+    def save(self, directory=None):
+        """Write the profile to disk and return its file name.
+
+        The artifact is named analysis-<id>.prof after the first analysis, with
+        a hard link per further analysis of the same request. A profile larger
+        than PROFILE_MAX_BYTES is replaced by a text report of the top functions.
+        """
+        directory = directory or settings.PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        if self.analysis_ids:
+            names = [f'analysis-{analysis_id}' for analysis_id in self.analysis_ids]
+        else:
+            names = [f'request-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}']
+
+        path = os.path.join(directory, names[0] + '.prof')
+        self.profiler.dump_stats(path)
+        extension = '.prof'
+        if os.path.getsize(path) > settings.PROFILE_MAX_BYTES:
+            report = io.StringIO()
+            pstats.Stats(path, stream=report).sort_stats('cumulative').print_stats(50)
+            os.remove(path)
+            extension = '.txt'
+            path = os.path.join(directory, names[0] + extension)
+            with open(path, 'w') as f:
+                f.write(report.getvalue()[:settings.PROFILE_MAX_BYTES])
+
+        for name in names[1:]:
+            link = os.path.join(directory, name + extension)
+            try:
+                os.link(path, link)
+            except FileExistsError:
+                pass
+
+        prune_profiles(directory)
+        return names[0] + extension
+
+def prune_profiles(directory=None):
+    """Delete profiles past PROFILE_MAX_AGE and the oldest beyond PROFILE_MAX_FILES"""
+    directory = directory or settings.PROFILE_DIR
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.is_file()]
+    except FileNotFoundError:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+
+    cutoff = time.time() - settings.PROFILE_MAX_AGE
+    for index, entry in enumerate(entries):
+        if index >= settings.PROFILE_MAX_FILES or entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+def _save(profile):
+    """Save a request profile, logging rather than raising if it cannot be written"""
+    try:
+        return profile.save()
+    except OSError as e:
+        logger.error('Error saving profile: %s', e)
+        return None
+
+def _profile_stream(profile, chunks):
+    """Yield a streaming response's chunks, profiling the work that produces each one.
+
+    The profile is saved once the stream ends or the client goes away.
+    """
+    chunks = iter(chunks)
+    try:
+        while True:
+            try:
+                profile.start()
+            except ValueError as e:
+                logger.warning('Profiling skipped: %s', e)
+                yield from chunks
+                return
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                profile.stop()
+            yield chunk
+    finally:
+        artifact = _save(profile)
+        if artifact:
+            logger.info('Saved streaming response profile %s', artifact)
+
+def profiled(view):
+    """Profile a view when profile_requested() allows it or sampling picks the request.
+
+    Only the request thread is profiled; work done in the parse process pool
+    shows up as time waiting on it. For a streaming response, the work done
+    while each chunk is produced is profiled too, and the artifact is logged
+    since the headers have already been sent by the time it is saved.
+    """
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        requested = profile_requested(request)
+        if not requested and random.random() >= settings.PROFILE_SAMPLE_RATE:
+            return view(self, request, *args, **kwargs)
+
+        profile = RequestProfile()
+        try:
+            profile.start()
+        except ValueError as e:
+            logger.warning('Profiling skipped: %s', e)
+            return view(self, request, *args, **kwargs)
+        try:
+            response = view(self, request, *args, **kwargs)
+        finally:
+            profile.stop()
+
+        if getattr(response, 'streaming', False):
+            response.streaming_content = _profile_stream(profile, response.streaming_content)
+            return response
+
+        artifact = _save(profile)
+        # Only a caller allowed to ask for a profile is told where it went
+        if artifact and requested:
+            response['X-Profile-Artifact'] = artifact
+        elif artifact:
+            logger.info('Saved sampled request profile %s', artifact)
+        return response
+    return wrapper
@@ -0,0 +1,76 @@
+import numpy as np
+from django.core.files.storage import default_storage
+
+from ..models import Resume
+from .analyzer import ANALYZER_VERSION, score_similarities
+
+def rank_stored_resumes(job, limit=None):
+    """Score every stored resume against a job profile and return them ranked.
+
+    Keyword matches come from one sparse resume x job-keyword matrix and
+    similarities from one corpus TF-IDF product, so no NLP runs at all.
+    Resumes without features from the current analyzer are skipped rather
+    than recomputed here; reanalyze_stale brings them up to date. A file
+    uploaded several times is ranked once, as its first stored copy.
+    Returns (results, total scored, stale resumes skipped).
+    """
+    from scipy import sparse
+
+    current = Resume.objects.filter(features_version=ANALYZER_VERSION).exclude(keywords__isnull=True)
+    # Resumes without stored text can never be scored and are not counted
+    skipped = (Resume.objects.exclude(extracted_text='')
+               .exclude(features_version=ANALYZER_VERSION, keywords__isnull=False)
+               .count())
+
+    rows = []
+    seen = set()
+    for content_hash, *row in (current.order_by('id')
+                               .values_list('content_hash', 'id', 'file', 'keywords', 'term_counts')):
+        # Resumes stored before hashing have no content_hash and are all kept
+        if content_hash:
+            if content_hash in seen:
+                continue
+            seen.add(content_hash)
+        rows.append(row)
+    if not rows:
+        return [], 0, skipped
+
+    job_terms = list(job['keywords'])
+    term_index = {term: index for index, term in enumerate(job_terms)}
+    row_indices, col_indices = [], []
+    for row, (_, _, keywords, _) in enumerate(rows):
+        for keyword in keywords:
+            col = term_index.get(keyword)
+            if col is not None:
+                row_indices.append(row)
+                col_indices.append(col)
+    # Each match is weighted by how often the job mentions the keyword
+    matches = sparse.csr_matrix(
+        ([job['keywords'][job_terms[col]] for col in col_indices], (row_indices, col_indices)),
+        shape=(len(rows), len(job_terms)),
+    )
+
+    # Same weighted coverage as analyze_resume, applied to every resume at once
+    total_weight = sum(job['keywords'].values())
+    if total_weight:
+        keyword_scores = np.asarray(matches.sum(axis=1)).ravel() / total_weight
+    else:
+        keyword_scores = np.zeros(len(rows))
+    similarity_scores = np.asarray(score_similarities(
+        [term_counts for _, _, _, term_counts in rows], job['term_counts']
+    ))
+    ats_scores = np.round((0.6 * keyword_scores + 0.4 * similarity_scores) * 100, 2)
+
+    order = np.argsort(-ats_scores, kind='stable')[:limit]
+    results = [
+        {
+            'id': rows[i][0],
+            'file': default_storage.url(rows[i][1]),
+            'ats_score': float(ats_scores[i]),
+            'keyword_match': round(float(keyword_scores[i]) * 100, 2),
+            'semantic_similarity': round(float(similarity_scores[i]) * 100, 2),
+            'matched_keywords': [job_terms[col] for col in matches[i].indices],
+        }
+        for i in order
+    ]
+    return results, len(rows), skipped
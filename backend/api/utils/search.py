@@ -0,0 +1,284 @@
+from collections import Counter
+import math
+import re
+import threading
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Case, Count, Exists, F, FloatField, OuterRef, Q, Sum, Value, When
+
+from ..models import KeywordPosting, Resume
+from .analyzer import normalize_keyword, skill_name
+from .lru import LRUCache
+from .metrics import timed
+
+KEYWORD_MAX_LENGTH = KeywordPosting._meta.get_field('keyword').max_length
+
+# Parentheses, quoted phrases and bare terms; anything but whitespace,
+# parentheses and quotes can be part of a term (c++, ci/cd, node.js)
+_TOKEN = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+_OPERATORS = ('AND', 'OR', 'NOT')
+
+_stats_cache = None
+_stats_cache_lock = threading.Lock()
+
+def index_keywords(resumes):
+    """Replace the keyword postings of resumes with counts of their current keywords"""
+    # A resume can be passed more than once, e.g. once per analysis of it
+    resumes = list({resume.id: resume for resume in resumes if resume.id is not None}.values())
+    KeywordPosting.objects.filter(resume__in=[resume.id for resume in resumes]).delete()
+    KeywordPosting.objects.bulk_create([
+        KeywordPosting(keyword=keyword, resume_id=resume.id, count=count)
+        for resume in resumes
+        for keyword, count in Counter(resume.keywords or []).items()
+        if len(keyword) <= KEYWORD_MAX_LENGTH
+    ], batch_size=5000)
+
+def _get_stats_cache():
+    global _stats_cache
+    with _stats_cache_lock:
+        if _stats_cache is None:
+            _stats_cache = LRUCache(maxsize=settings.SEARCH_STATS_CACHE_SIZE, ttl=settings.SEARCH_STATS_TTL)
+        return _stats_cache
+
+def document_counts(keywords):
+    """Return how many resumes mention each keyword.
+
+    Counting the postings of a common keyword reads a large part of the
+    index, and the counts only plan queries and weight their ranking, so
+    they are memoized for SEARCH_STATS_TTL seconds.
+    """
+    cache = _get_stats_cache()
+    counts = {}
+    missing = set()
+    for keyword in keywords:
+        count = cache.get(keyword)
+        if count is None:
+            missing.add(keyword)
+        else:
+            counts[keyword] = count
+    if missing:
+        fetched = dict(KeywordPosting.objects.filter(keyword__in=missing)
+                       .values_list('keyword').annotate(Count('resume')))
+        for keyword in missing:
+            counts[keyword] = fetched.get(keyword, 0)
+            cache.set(keyword, counts[keyword])
+    return counts
+
+def parse_query(query):
+    """Parse a boolean keyword query into a tree of tuples.
+
+    Terms are combined with AND, OR and NOT (in any case) and grouped with
+    parentheses; adjacent terms are ANDed. A quoted phrase naming a skill is
+    matched as that skill, any other requires each of its words. Terms are
+    normalized as keywords are extracted, to their skill name or lemma.
+    Returns ('term', keyword), ('not', node) or ('and'|'or', left, right);
+    raises ValueError on a malformed query, or one longer than
+    SEARCH_MAX_QUERY_TOKENS words and operators or nested deeper than
+    SEARCH_MAX_QUERY_DEPTH.
+    """
+    tokens = _TOKEN.findall(query)
+    # Each word of a quoted phrase becomes a term of its own
+    if sum(len(token.split()) for token in tokens) > settings.SEARCH_MAX_QUERY_TOKENS:
+        raise ValueError(f'Query is longer than {settings.SEARCH_MAX_QUERY_TOKENS} words and operators')
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def is_operator(token, operator):
+        return token is not None and token.upper() == operator
+
+    def parse_or():
+        node = parse_and()
+        while is_operator(peek(), 'OR'):
+            take()
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() is not None and peek() != ')' and not is_operator(peek(), 'OR'):
+            if is_operator(peek(), 'AND'):
+                take()
+            node = ('and', node, parse_not())
+        return node
+
+    def parse_not():
+        if is_operator(peek(), 'NOT'):
+            take()
+            return ('not', parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        token = peek()
+        if token is None:
+            raise ValueError('Query ends where a term was expected')
+        if token == ')' or token.upper() in _OPERATORS:
+            raise ValueError(f'Expected a term before "{token}"')
+        take()
+        if token == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError('Missing closing parenthesis')
+            take()
+            return node
+        words = token.strip('"').split()
+        if not words:
+            raise ValueError('Empty quoted phrase')
+        skill = skill_name(' '.join(words))
+        if skill is not None:
+            return ('term', skill)
+        node = ('term', normalize_keyword(words[0]))
+        for word in words[1:]:
+            node = ('and', node, ('term', normalize_keyword(word)))
+        return node
+
+    if not tokens:
+        raise ValueError('Empty query')
+    tree = parse_or()
+    if position < len(tokens):
+        raise ValueError(f'Unexpected "{tokens[position]}"')
+    if _depth(tree) > settings.SEARCH_MAX_QUERY_DEPTH:
+        raise ValueError(f'Query nests NOT, AND and OR more than {settings.SEARCH_MAX_QUERY_DEPTH} levels deep')
+    return tree
+
+def _depth(node, parent=None):
+    """Count the levels of nested conditions a query tree compiles to.
+
+    A chain of the same operator is a single level, as in the SQL.
+    """
+    kind = node[0]
+    if kind == 'term':
+        return 0
+    if kind == 'not':
+        return 1 + _depth(node[1], kind)
+    return (kind != parent) + max(_depth(node[1], kind), _depth(node[2], kind))
+
+def _query_terms(node, negated=False):
+    """Yield (keyword, negated) for each term of a query tree"""
+    if node[0] == 'term':
+        yield node[1], negated
+    elif node[0] == 'not':
+        yield from _query_terms(node[1], not negated)
+    else:
+        yield from _query_terms(node[1], negated)
+        yield from _query_terms(node[2], negated)
+
+def _conjuncts(node):
+    """Flatten a chain of ANDs into its operands"""
+    if node[0] == 'and':
+        return _conjuncts(node[1]) + _conjuncts(node[2])
+    return [node]
+
+def _estimate(node, document_counts, total_resumes):
+    """Estimate how many resumes a query tree matches from its terms' document counts"""
+    kind = node[0]
+    if kind == 'term':
+        return document_counts.get(node[1], 0)
+    if kind == 'not':
+        return total_resumes - _estimate(node[1], document_counts, total_resumes)
+    left = _estimate(node[1], document_counts, total_resumes)
+    right = _estimate(node[2], document_counts, total_resumes)
+    return min(left, right) if kind == 'and' else min(left + right, total_resumes)
+
+def _query_filter(node, document_counts, total_resumes, driving=True):
+    """Translate a query tree into a Resume filter over the keyword postings.
+
+    The filter is built for the database to start from the posting list of
+    the rarest term in each conjunction (an IN subquery on resume ids) and
+    check every other term of it, and every negated term, with an EXISTS
+    lookup on the (keyword, resume) index. Reading whole posting lists of
+    common terms only to discard most of them is what makes a naive
+    translation slow.
+    """
+    kind = node[0]
+    if kind == 'term':
+        postings = KeywordPosting.objects.filter(keyword=node[1])
+        if driving:
+            return Q(id__in=postings.values('resume_id'))
+        return Exists(postings.filter(resume=OuterRef('pk')))
+    if kind == 'not':
+        return ~_query_filter(node[1], document_counts, total_resumes, driving=False)
+    if kind == 'or':
+        return (_query_filter(node[1], document_counts, total_resumes, driving)
+                | _query_filter(node[2], document_counts, total_resumes, driving))
+
+    conjuncts = _conjuncts(node)
+    if driving:
+        positive = [conjunct for conjunct in conjuncts if conjunct[0] != 'not']
+        driver = min(positive, key=lambda conjunct: _estimate(conjunct, document_counts, total_resumes),
+                     default=None)
+    else:
+        driver = None
+    condition = None
+    for conjunct in conjuncts:
+        part = _query_filter(conjunct, document_counts, total_resumes, driving=conjunct is driver)
+        condition = part if condition is None else condition & part
+    return condition
+
+@timed('search')
+def search_resumes(query, limit=50):
+    """Find the stored resumes whose keywords satisfy a boolean query.
+
+    The query runs in the database against the keyword index, each term as
+    a subquery on its postings. Matches are ranked by the TF-IDF weight of the
+    query terms they contain: each occurrence counts, and rarer keywords
+    count for more. Returns (results, total): the top results as dicts with
+    the resume id, file and score and the per-term counts, and the number of
+    matching resumes. A file uploaded several times is found once, as its
+    first stored copy. Resumes indexed by an older analyzer version are only
+    found once reanalyze_stale has re-indexed them.
+    """
+    tree = parse_query(query)
+    terms = list(_query_terms(tree))
+    counts = document_counts({keyword for keyword, _ in terms})
+    total_resumes = Resume.objects.count()
+
+    # Resumes whose text could not be parsed have no keywords and match nothing
+    matches = Resume.objects.exclude(keywords__isnull=True).filter(_query_filter(tree, counts, total_resumes))
+    # Copies of a file indexed by the same analyzer hold the same keywords,
+    # so a later copy matches exactly when the first one does
+    earlier_copy = (Resume.objects.exclude(content_hash='').exclude(keywords__isnull=True)
+                    .filter(content_hash=OuterRef('content_hash'), features_version=OuterRef('features_version'),
+                            id__lt=OuterRef('id')))
+    matches = matches.filter(~Exists(earlier_copy))
+    total = matches.count()
+    if not total:
+        return [], 0
+
+    ranked_terms = {keyword for keyword, negated in terms if not negated and counts[keyword]}
+    if ranked_terms:
+        weight = Case(*[
+            When(keyword=keyword, then=Value(math.log(1 + total_resumes / counts[keyword])))
+            for keyword in ranked_terms
+        ], output_field=FloatField())
+        top = list(KeywordPosting.objects.filter(keyword__in=ranked_terms, resume__in=matches.values('id'))
+                   .values('resume_id').annotate(score=Sum(F('count') * weight))
+                   .order_by('-score', '-resume_id').values_list('resume_id', 'score')[:limit])
+    else:
+        # Only negated terms: nothing to rank by, newest first
+        top = [(resume_id, 0.0) for resume_id in matches.order_by('-id').values_list('id', flat=True)[:limit]]
+
+    resume_ids = [resume_id for resume_id, _ in top]
+    files = dict(Resume.objects.filter(id__in=resume_ids).values_list('id', 'file'))
+    matched = {}
+    for resume_id, keyword, count in (KeywordPosting.objects.filter(resume__in=resume_ids, keyword__in=ranked_terms)
+                                      .order_by('keyword').values_list('resume_id', 'keyword', 'count')):
+        matched.setdefault(resume_id, {})[keyword] = count
+
+    results = [
+        {
+            'id': resume_id,
+            'file': default_storage.url(files[resume_id]),
+            'score': round(score, 4),
+            'matched_keywords': matched.get(resume_id, {}),
+        }
+        for resume_id, score in top
+    ]
+    return results, total
@@ -0,0 +1,87 @@
+# Curated skills vocabulary, matched case-insensitively as whole phrases by
+# the analyzer. Each skill is counted under its canonical name, whichever of
+# its spellings a document uses. Keep names lowercase; words that are also
+# common English (go, rust, rest, excel) are only listed in unambiguous forms.
+SKILLS = {
+    # Languages
+    'python': ['python'],
+    'java': ['java'],
+    'javascript': ['javascript', 'java script', 'js', 'ecmascript'],
+    'typescript': ['typescript', 'ts'],
+    'c++': ['c++', 'cpp'],
+    'c#': ['c#', 'csharp', 'c sharp'],
+    'golang': ['golang'],
+    'ruby': ['ruby'],
+    'php': ['php'],
+    'kotlin': ['kotlin'],
+    'scala': ['scala'],
+    'r programming': ['r programming', 'r language'],
+    'sql': ['sql'],
+    'html': ['html', 'html5'],
+    'css': ['css', 'css3'],
+    'bash': ['bash', 'shell scripting'],
+
+    # Frameworks and libraries
+    'django': ['django'],
+    'flask': ['flask'],
+    'fastapi': ['fastapi'],
+    'spring boot': ['spring boot', 'springboot'],
+    'react': ['react', 'react.js', 'reactjs'],
+    'angular': ['angular', 'angularjs'],
+    'vue': ['vue', 'vue.js', 'vuejs'],
+    'node.js': ['node.js', 'nodejs'],
+    'pandas': ['pandas'],
+    'numpy': ['numpy'],
+    'scikit-learn': ['scikit-learn', 'scikit learn', 'sklearn'],
+    'tensorflow': ['tensorflow'],
+    'pytorch': ['pytorch'],
+    'spacy': ['spacy'],
+    'celery': ['celery'],
+
+    # Data stores and messaging
+    'postgresql': ['postgresql', 'postgres'],
+    'mysql': ['mysql'],
+    'sqlite': ['sqlite'],
+    'mongodb': ['mongodb', 'mongo'],
+    'redis': ['redis'],
+    'elasticsearch': ['elasticsearch', 'elastic search'],
+    'kafka': ['kafka', 'apache kafka'],
+    'rabbitmq': ['rabbitmq'],
+    'spark': ['spark', 'apache spark', 'pyspark'],
+    'nosql': ['nosql'],
+
+    # Cloud and infrastructure
+    'aws': ['aws', 'amazon web services'],
+    'gcp': ['gcp', 'google cloud', 'google cloud platform'],
+    'azure': ['azure', 'microsoft azure'],
+    'docker': ['docker'],
+    'kubernetes': ['kubernetes', 'k8s'],
+    'terraform': ['terraform'],
+    'ansible': ['ansible'],
+    'linux': ['linux'],
+    'git': ['git'],
+    'ci/cd': ['ci/cd', 'ci / cd', 'cicd', 'continuous integration', 'continuous delivery', 'continuous deployment'],
+    'infrastructure as code': ['infrastructure as code', 'iac'],
+    'cloud computing': ['cloud computing'],
+
+    # Practices and fields
+    'rest api': ['rest api', 'rest apis', 'restful api', 'restful apis'],
+    'graphql': ['graphql'],
+    'microservices': ['microservices', 'microservice', 'micro services'],
+    'machine learning': ['machine learning', 'ml'],
+    'deep learning': ['deep learning'],
+    'natural language processing': ['natural language processing', 'nlp'],
+    'computer vision': ['computer vision'],
+    'data pipeline': ['data pipeline', 'data pipelines', 'etl'],
+    'data analysis': ['data analysis', 'data analytics'],
+    'data engineering': ['data engineering'],
+    'data visualization': ['data visualization', 'data visualisation'],
+    'statistics': ['statistics', 'statistical analysis'],
+    'tableau': ['tableau'],
+    'power bi': ['power bi', 'powerbi'],
+    'excel': ['microsoft excel', 'ms excel', 'excel spreadsheets'],
+    'unit testing': ['unit testing', 'unit tests'],
+    'agile': ['agile'],
+    'scrum': ['scrum'],
+    'project management': ['project management'],
+}
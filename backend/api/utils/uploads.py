@@ -0,0 +1,158 @@
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, SimpleUploadedFile, TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser, MultiPartParserError
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+from .parser import sniff_format
+
+try:
+    import magic
+except ImportError:
+    # python-magic needs the libmagic system library
+    magic = None
+
+PDF_MIME = 'application/pdf'
+DOCX_MIME = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+def sniff_kind(head):
+    """Identify a resume format ('pdf' or 'docx') from a file's first bytes; None if unsupported"""
+    mime = None
+    if magic is not None:
+        try:
+            mime = magic.from_buffer(head, mime=True)
+        except magic.MagicException:
+            pass
+    if mime == PDF_MIME:
+        return 'pdf'
+    if mime == DOCX_MIME:
+        return 'docx'
+
+    # Without libmagic, or when it only sees a generic zip, fall back to the
+    # formats' own signatures
+    return sniff_format(head)
+
+class ResumeUploadHandler(FileUploadHandler):
+    """Inspect each uploaded file while its chunks arrive.
+
+    The first chunk is sniffed for the file type and every chunk is hashed and
+    counted, so unsupported or oversized files are dropped before more of
+    them is buffered. Accepted files stay in memory up to
+    RESUME_UPLOAD_MEMORY_SIZE bytes and spill to a temporary file past that.
+    Rejected files come through with their reason in upload_error and no
+    content.
+    """
+    max_size_setting = 'RESUME_MAX_UPLOAD_SIZE'
+    unsupported_message = 'Unsupported file type; upload a PDF or DOCX file'
+
+    def sniff(self, head):
+        return sniff_kind(head)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.kind = None
+        self.error = None
+        self.buffer = None
+
+    def _reject(self, error):
+        self.error = error
+        if isinstance(self.buffer, TemporaryUploadedFile):
+            self.buffer.close()
+        self.buffer = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error is not None:
+            return None
+
+        if self.buffer is None:
+            self.kind = self.sniff(raw_data[:2048])
+            if self.kind is None:
+                self._reject(self.unsupported_message)
+                return None
+            self.buffer = io.BytesIO()
+
+        self.size += len(raw_data)
+        max_size = getattr(settings, self.max_size_setting)
+        if self.size > max_size:
+            self._reject(f'File is larger than {max_size} bytes')
+            return None
+
+        if isinstance(self.buffer, io.BytesIO) and self.size > settings.RESUME_UPLOAD_MEMORY_SIZE:
+            spill = TemporaryUploadedFile(self.file_name, self.content_type, 0,
+                                          self.charset, self.content_type_extra)
+            spill.write(self.buffer.getvalue())
+            self.buffer = spill
+
+        self.digest.update(raw_data)
+        self.buffer.write(raw_data)
+        # Later handlers never see the data; this handler stores it
+        return None
+
+    def file_complete(self, file_size):
+        if self.error is None and self.buffer is None:
+            self.error = 'Uploaded file is empty'
+
+        if self.error is not None:
+            upload = SimpleUploadedFile(self.file_name, b'', self.content_type)
+        elif isinstance(self.buffer, io.BytesIO):
+            self.buffer.seek(0)
+            upload = InMemoryUploadedFile(self.buffer, self.field_name, self.file_name, self.content_type,
+                                          file_size, self.charset, self.content_type_extra)
+        else:
+            self.buffer.flush()
+            self.buffer.seek(0)
+            self.buffer.size = file_size
+            upload = self.buffer
+
+        upload.upload_error = self.error
+        upload.content_hash = self.digest.hexdigest() if self.error is None else None
+        upload.resume_kind = self.kind
+        return upload
+
+class ArchiveUploadHandler(ResumeUploadHandler):
+    """ResumeUploadHandler for zip archives of resumes, with their own size limit"""
+    max_size_setting = 'ZIP_MAX_UPLOAD_SIZE'
+    unsupported_message = 'Unsupported file type; upload a zip archive'
+
+    def sniff(self, head):
+        # Local file header, or the end record of an empty archive
+        return 'zip' if head.startswith((b'PK\x03\x04', b'PK\x05\x06')) else None
+
+class ResumeUploadParser(MultiPartParser):
+    """Multipart parser that streams files through ResumeUploadHandler"""
+    handler_class = ResumeUploadHandler
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context['request']
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+
+        try:
+            parser = DjangoMultiPartParser(meta, stream, [self.handler_class(request)], encoding)
+            data, files = parser.parse()
+            return DataAndFiles(data, files)
+        except MultiPartParserError as e:
+            raise ParseError(f'Multipart form parse error - {str(e)}')
+
+class ArchiveUploadParser(ResumeUploadParser):
+    """Multipart parser that streams files through ArchiveUploadHandler"""
+    handler_class = ArchiveUploadHandler
+
+def parse_source(upload, resume):
+    """Return what parse_resume should read for a stored upload, as a (source, kind) pair.
+
+    Uploads still held in memory are parsed from their bytes; larger ones were
+    moved into storage from their temporary file and are read from there.
+    """
+    kind = getattr(upload, 'resume_kind', None)
+    if isinstance(getattr(upload, 'file', None), io.BytesIO):
+        return upload.file.getvalue(), kind
+    return resume.file.path, kind
@@ -1,19 +1,33 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import FormParser
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth.models import User
-from .models import Resume, AnalysisResult
+from .models import Resume, AnalysisResult, JobPosting, AnalysisJob
 from .utils.parser import parse_resume
-from .utils.analyzer import analyze_resume
+from .utils.ocr import observe_ocr_timings
+from .utils.uploads import ResumeUploadParser, parse_source
+from .utils.archives import ingest_zip
+from .utils.cache import store_resume, store_resumes, remember_text, parse_cache_stats
+from .utils.postings import get_or_create_posting, refresh_posting
+from .utils.rescore import rank_stored_resumes
+from .utils.search import search_resumes
+from .utils.pipeline import save_analysis, analyze_stored_resumes, resume_features
+from .utils.jobs import enqueue_resumes, job_status
+from .utils.analyzer import analyze_features
+from .utils.metrics import render_metrics, server_timing
+from .utils.profiling import profiled
+import math
 import os
 import json
 from django.db.models import Q
 from django.utils import timezone
+from django.conf import settings
+from django.core.files.storage import default_storage
 
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_http_methods
 import json
@@ -32,38 +46,128 @@ def health_check(request):
     return JsonResponse({
         'status': 'healthy',
         'version': '1.0.0',
-        'timestamp': timezone.now().isoformat()
+        'timestamp': timezone.now().isoformat(),
+        'parse_cache': parse_cache_stats()
     })
 
+@require_http_methods(['GET'])
+def metrics(request):
+    """Expose per-stage timing histograms in the Prometheus text format"""
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def resolve_job_posting(request):
+    """Return the posting named by job_posting_id, or persist the raw job_description.
+
+    Raises ValueError for an id that is not an integer and
+    JobPosting.DoesNotExist for one that names no posting.
+    """
+    job_posting_id = request.data.get('job_posting_id')
+    if job_posting_id:
+        return refresh_posting(JobPosting.objects.get(id=int(job_posting_id)))
+    return get_or_create_posting(request.data.get('job_description', ''))
+
+def wants_async(request):
+    """Whether the client asked for the upload to be queued instead of analyzed inline"""
+    value = request.query_params.get('async', request.data.get('async', ''))
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def queued_response(job):
+    return Response({
+        'job_id': job.id,
+        'status': 'PENDING',
+        'status_url': f'/api/jobs/{job.id}/'
+    }, status=status.HTTP_202_ACCEPTED)
+
+def job_posting_not_found():
+    return Response({'error': 'Job posting not found'},
+                    status=status.HTTP_404_NOT_FOUND)
+
+def invalid_job_posting_id():
+    return Response({'error': 'Invalid job_posting_id'},
+                    status=status.HTTP_400_BAD_REQUEST)
+
+class JobPostingViewSet(viewsets.ViewSet):
+    permission_classes = []  # Remove authentication requirement
+    
+    def create(self, request):
+        """Store a job description with its keywords precomputed for later analyses"""
+        description = request.data.get('description', '')
+        if not description.strip():
+            return Response({'error': 'No job description provided'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        posting = get_or_create_posting(description, title=request.data.get('title', ''))
+        return Response(self._serialize(posting), status=status.HTTP_201_CREATED)
+    
+    def list(self, request):
+        """List stored job postings, newest first"""
+        postings = JobPosting.objects.order_by('-created_at').only('id', 'title', 'created_at')
+        return Response([
+            {'id': posting.id, 'title': posting.title, 'created_at': posting.created_at}
+            for posting in postings
+        ])
+    
+    def retrieve(self, request, pk=None):
+        """Get a job posting with its precomputed keywords"""
+        try:
+            posting = JobPosting.objects.get(id=int(pk))
+        except ValueError:
+            return invalid_job_posting_id()
+        except JobPosting.DoesNotExist:
+            return job_posting_not_found()
+        return Response(self._serialize(posting))
+    
+    def _serialize(self, posting):
+        return {
+            'id': posting.id,
+            'title': posting.title,
+            'description': posting.description,
+            'keywords': sorted(set(posting.keywords)),
+            'created_at': posting.created_at,
+        }
+
 class ResumeViewSet(viewsets.ViewSet):
-    parser_classes = [MultiPartParser, FormParser]
+    parser_classes = [ResumeUploadParser, FormParser]
     permission_classes = []  # Remove authentication requirement
     
+    @server_timing
+    @profiled
     def upload_resume(self, request):
         """Upload a resume file and analyze it against a job description"""
         file = request.FILES.get('file')
-        job_description = request.data.get('job_description', '')
         
         if not file:
             return Response({'error': 'No resume file uploaded'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Save the resume file without user association
-        resume = Resume.objects.create(
-            file=file
-        )
-        resume_text = parse_resume(resume.file.path)
+        if file.upload_error:
+            return Response({'error': file.upload_error}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            job_posting = resolve_job_posting(request)
+        except ValueError:
+            return invalid_job_posting_id()
+        except JobPosting.DoesNotExist:
+            return job_posting_not_found()
         
-        # Analyze the resume
-        analysis_result = analyze_resume(resume_text, job_description)
+        # Save the resume file without user association, reusing identical uploads
+        resume, resume_text = store_resume(file)
+        
+        if wants_async(request):
+            return queued_response(enqueue_resumes([(file.name, resume)], job_posting))
+        
+        if resume_text is None:
+            ocr_timings = []
+            resume_text = parse_resume(*parse_source(file, resume), timings=ocr_timings)
+            observe_ocr_timings(ocr_timings)
+            remember_text(resume, resume_text)
+        
+        # Analyze the resume, storing its features for later rescoring
+        analysis_result, = analyze_features(resume_features([resume]), job_posting.profile())
         
         # Save analysis result
-        analysis = AnalysisResult.objects.create(
-            resume=resume,
-            keywords_matched=analysis_result['keyword_match']['matched_keywords'],
-            score=analysis_result['keyword_match']['score'] / 100,
-            feedback=json.dumps(analysis_result)
-        )
+        analysis = save_analysis(resume, job_posting, analysis_result)
         
         return Response({
             'id': resume.id,
@@ -76,7 +180,7 @@ class ResumeViewSet(viewsets.ViewSet):
         """Get analysis results for a specific resume"""
         try:
             analysis = AnalysisResult.objects.get(id=pk)
-            feedback = json.loads(analysis.feedback)
+            feedback = analysis.to_feedback()
             return Response({
                 'id': analysis.id,
                 'resume_id': analysis.resume.id,
@@ -90,63 +194,75 @@ class ResumeViewSet(viewsets.ViewSet):
 
 @method_decorator(csrf_exempt, name='dispatch')
 class HRViewSet(viewsets.ViewSet):
-    parser_classes = [MultiPartParser, FormParser]
+    parser_classes = [ResumeUploadParser, FormParser]
     permission_classes = []  # Remove authentication requirement
     
     @csrf_exempt
+    @server_timing
+    @profiled
     def upload_multiple_resumes(self, request):
         """Upload multiple resumes and get ranked analysis"""
         files = request.FILES.getlist('resumes')
-        job_description = request.data.get('job_description', '')
         
         if not files:
             return Response({'error': 'No files uploaded'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
+        try:
+            job_posting = resolve_job_posting(request)
+        except ValueError:
+            return invalid_job_posting_id()
+        except JobPosting.DoesNotExist:
+            return job_posting_not_found()
+        
+        stream_format = request.query_params.get('stream', request.data.get('stream', ''))
+        if stream_format in ('ndjson', 'sse'):
+            return self._stream_analysis(files, job_posting, stream_format)
+        
+        # Save every file first so parsing and analysis can run as batches;
+        # files seen before come back with their text and skip parsing
+        stored, errors = store_resumes(files)
+        if not stored:
+            # Every file was rejected while uploading, as oversized or not a PDF/DOCX
+            return Response({'error': 'No valid resumes uploaded', 'errors': errors},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        if wants_async(request):
+            return queued_response(enqueue_resumes([(upload.name, resume) for upload, resume in stored], job_posting))
+        
+        outcomes = analyze_stored_resumes(
+            [resume for _, resume in stored],
+            job_posting,
+            sources=[parse_source(upload, resume) for upload, resume in stored],
+        )
+        
         results = []
-        for file in files:
-            try:
-                resume = Resume.objects.create(file=file)
-                resume_text = parse_resume(resume.file.path)
-                analysis_result = analyze_resume(resume_text, job_description)
-                
-                analysis = AnalysisResult.objects.create(
-                    resume=resume,
-                    keywords_matched=analysis_result['keyword_match']['matched_keywords'],
-                    score=analysis_result['keyword_match']['score'] / 100,
-                    feedback=json.dumps(analysis_result)
-                )
-                
-                results.append({
-                    'id': resume.id,
-                    'file': resume.file.url,
-                    'analysis': analysis_result,
-                    'analysis_id': analysis.id
-                })
-            except Exception as e:
-                # If there's an error processing one resume, continue with others
-                print(f"Error processing resume {file.name}: {str(e)}")
+        for (upload, resume), outcome in zip(stored, outcomes):
+            if 'error' in outcome:
+                errors.append({'file': upload.name, 'error': outcome['error']})
                 continue
+            results.append({
+                'id': resume.id,
+                'file': resume.file.url,
+                'analysis': outcome['feedback'],
+                'analysis_id': outcome['analysis'].id
+            })
         
         if not results:
-            return Response({'error': 'Failed to process any resumes'}, 
-                          status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({'error': 'Failed to process any resumes', 'errors': errors}, 
+                          status=status.HTTP_400_BAD_REQUEST)
         
         # Sort results by score in descending order
         results.sort(key=lambda x: x['analysis']['ats_score']['score'], reverse=True)
         
         response_data = {
             'results': [
-                {
-                    'ats_score': result['analysis']['ats_score']['score'],
-                    'keyword_match': result['analysis']['keyword_match']['score'],
-                    'skill_match': result['analysis'].get('skill_match', {}).get('score', 0),
-                    'suggestions': result['analysis'].get('suggestions', []),
-                    'file': result['file']
-                }
+                self._summarize(result['analysis'], result['file'])
                 for result in results
             ],
-            'total_count': len(results)
+            'total_count': len(results),
+            'job_posting_id': job_posting.id,
+            'errors': errors
         }
         
         response = Response(response_data, status=status.HTTP_201_CREATED)
@@ -156,28 +272,260 @@ class HRViewSet(viewsets.ViewSet):
         
         return response
 
+    def _summarize(self, feedback, file_url):
+        return {
+            'ats_score': feedback['ats_score']['score'],
+            'keyword_match': feedback['keyword_match']['score'],
+            'skill_match': feedback.get('skill_match', {}).get('score', 0),
+            'suggestions': feedback.get('suggestions', []),
+            'file': file_url
+        }
+
+    def _stream_analysis(self, files, job_posting, stream_format):
+        """Stream each resume's result as soon as its batch is analyzed.
+
+        The multipart body has already been received by the time this runs:
+        the upload handler keeps small files in memory and spills larger ones
+        to temporary files. Only storing and analysis happen ANALYZER_BATCH_SIZE
+        files at a time, so the first frame waits for the whole upload plus
+        one batch, not for every analysis. Only scores are kept for the
+        closing ranked summary frame.
+        """
+        def frame(event, data):
+            if stream_format == 'sse':
+                return f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+            return json.dumps({'type': event, **data}, default=str) + '\n'
+        
+        def generate():
+            ranking = []
+            error_count = 0
+            batch_size = settings.ANALYZER_BATCH_SIZE
+            for start in range(0, len(files), batch_size):
+                stored, errors = store_resumes(files[start:start + batch_size])
+                for error in errors:
+                    error_count += 1
+                    yield frame('error', error)
+                
+                outcomes = analyze_stored_resumes(
+                    [resume for _, resume in stored],
+                    job_posting,
+                    sources=[parse_source(upload, resume) for upload, resume in stored],
+                )
+                for (upload, resume), outcome in zip(stored, outcomes):
+                    if 'error' in outcome:
+                        error_count += 1
+                        yield frame('error', {'file': upload.name, 'error': outcome['error']})
+                        continue
+                    result = self._summarize(outcome['feedback'], resume.file.url)
+                    result.update({'id': resume.id, 'analysis_id': outcome['analysis'].id})
+                    ranking.append((result['ats_score'], resume.id, outcome['analysis'].id, result['file']))
+                    yield frame('result', result)
+            
+            ranking.sort(key=lambda entry: entry[0], reverse=True)
+            yield frame('summary', {
+                'job_posting_id': job_posting.id,
+                'total_count': len(ranking),
+                'error_count': error_count,
+                'ranked': [
+                    {'ats_score': score, 'id': resume_id, 'analysis_id': analysis_id, 'file': file_url}
+                    for score, resume_id, analysis_id, file_url in ranking
+                ]
+            })
+        
+        content_type = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+        response = StreamingHttpResponse(generate(), content_type=content_type, status=status.HTTP_200_OK)
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        response['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    @csrf_exempt
+    @server_timing
+    @profiled
+    def ingest_zip_archive(self, request):
+        """Analyze and rank every resume in an uploaded zip archive"""
+        archive = request.FILES.get('archive')
+        if archive is None:
+            return Response({'error': 'No archive uploaded'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if archive.upload_error:
+            return Response({'error': archive.upload_error},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            job_posting = resolve_job_posting(request)
+        except ValueError:
+            return invalid_job_posting_id()
+        except JobPosting.DoesNotExist:
+            return job_posting_not_found()
+        
+        results, errors, duplicates = ingest_zip(archive, job_posting)
+        
+        if not results:
+            return Response({'error': 'Failed to process any resumes', 'errors': errors, 'duplicates': duplicates},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        results.sort(key=lambda x: x['feedback']['ats_score']['score'], reverse=True)
+        summaries = []
+        for result in results:
+            summary = self._summarize(result['feedback'], result['resume'].file.url)
+            summary.update({
+                'entry': result['file'],
+                'id': result['resume'].id,
+                'analysis_id': result['analysis'].id
+            })
+            summaries.append(summary)
+        
+        response = Response({
+            'results': summaries,
+            'total_count': len(summaries),
+            'job_posting_id': job_posting.id,
+            'errors': errors,
+            'duplicates': duplicates
+        }, status=status.HTTP_201_CREATED)
+        response['Access-Control-Allow-Origin'] = '*'
+        response['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, X-Frontend-Request'
+        return response
+
+    def rescore_resumes(self, request):
+        """Rank stored resumes against a job posting from their stored features, without re-uploading files"""
+        try:
+            limit = min(max(int(request.data.get('limit', 100)), 1), 500)
+        except (TypeError, ValueError):
+            return Response({'error': 'Invalid limit'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            job_posting = resolve_job_posting(request)
+        except ValueError:
+            return invalid_job_posting_id()
+        except JobPosting.DoesNotExist:
+            return job_posting_not_found()
+        
+        results, total, skipped = rank_stored_resumes(job_posting.profile(), limit=limit)
+        
+        return Response({
+            'job_posting_id': job_posting.id,
+            'total_resumes': total,
+            'skipped_stale': skipped,
+            'results': results
+        })
+
+    def search_resumes(self, request):
+        """Find stored resumes by keyword with a boolean query such as: kubernetes AND (terraform OR ansible)"""
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 500)
+        except ValueError:
+            return Response({'error': 'Invalid limit'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        try:
+            results, total = search_resumes(query, limit=limit)
+        except ValueError as e:
+            return Response({'error': f'Invalid query: {str(e)}'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'query': query,
+            'total_count': total,
+            'results': results
+        })
+
     def get_ranked_resumes(self, request):
-        """Get all uploaded resumes with their analysis results, sorted by score"""
-        resumes = Resume.objects.all()
-        results = []
+        """Get analysis results ranked by ATS score, a page at a time.
+
+        Ranking and paging happen in the database on the (ats_score, id) index:
+        pass the returned next_cursor back as ?cursor= for the following page,
+        and job_posting_id to rank only analyses made against that posting.
+        total_resumes is only counted for the first page, so later pages cost
+        the same however many analyses there are.
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                cursor_score, cursor_id = cursor.split(':')
+                cursor_score, cursor_id = float(cursor_score), int(cursor_id)
+                if not math.isfinite(cursor_score):
+                    raise ValueError(cursor)
+            job_posting_id = request.query_params.get('job_posting_id')
+            if job_posting_id:
+                job_posting_id = int(job_posting_id)
+        except ValueError:
+            return Response({'error': 'Invalid limit, cursor or job_posting_id'},
+                          status=status.HTTP_400_BAD_REQUEST)
         
-        for resume in resumes:
-            try:
-                analysis = AnalysisResult.objects.get(resume=resume)
-                feedback = json.loads(analysis.feedback)
-                results.append({
-                    'id': resume.id,
-                    'file': resume.file.url,
-                    'analysis': feedback,
-                    'analysis_id': analysis.id
-                })
-            except AnalysisResult.DoesNotExist:
-                continue
+        analyses = AnalysisResult.objects.order_by('-ats_score', '-id')
+        if job_posting_id:
+            analyses = analyses.filter(job_posting_id=job_posting_id)
         
-        # Sort by ATS score
-        results.sort(key=lambda x: x['analysis']['ats_score']['score'], reverse=True)
+        if cursor:
+            total = None
+            analyses = analyses.filter(
+                Q(ats_score__lt=cursor_score) | Q(ats_score=cursor_score, id__lt=cursor_id)
+            )
+        else:
+            total = analyses.count()
+        # Only the score columns are read, never the feedback blob
+        page = list(analyses.values(
+            'id', 'resume_id', 'resume__file', 'ats_score', 'score', 'similarity_score'
+        )[:limit + 1])
+        
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = f"{page[-1]['ats_score']}:{page[-1]['id']}"
         
         return Response({
-            'total_resumes': len(results),
-            'ranked_results': results
+            'job_posting_id': job_posting_id,
+            'total_resumes': total,
+            'ranked_results': [
+                {
+                    'id': analysis['resume_id'],
+                    'file': default_storage.url(analysis['resume__file']),
+                    'ats_score': analysis['ats_score'],
+                    'keyword_match': round(analysis['score'] * 100, 2),
+                    'semantic_similarity': round(analysis['similarity_score'] * 100, 2),
+                    'analysis_id': analysis['id']
+                }
+                for analysis in page
+            ],
+            'next_cursor': next_cursor
+        })
+
+class AnalysisJobViewSet(viewsets.ViewSet):
+    permission_classes = []  # Remove authentication requirement
+    
+    def retrieve(self, request, pk=None):
+        """Report the progress and per-file results of a queued analysis job"""
+        try:
+            job = AnalysisJob.objects.get(id=pk)
+        except AnalysisJob.DoesNotExist:
+            return Response({'error': 'Analysis job not found'},
+                          status=status.HTTP_404_NOT_FOUND)
+        
+        state, counts = job_status(job)
+        items = job.items.order_by('id').values(
+            'file_name', 'resume_id', 'status', 'error', 'analysis_id', 'analysis__ats_score'
+        )
+        
+        return Response({
+            'id': job.id,
+            'job_posting_id': job.job_posting_id,
+            'status': state,
+            'counts': counts,
+            'total_count': sum(counts.values()),
+            'items': [
+                {
+                    'file': item['file_name'],
+                    'resume_id': item['resume_id'],
+                    'status': item['status'],
+                    'error': item['error'],
+                    'analysis_id': item['analysis_id'],
+                    'ats_score': item['analysis__ats_score']
+                }
+                for item in items
+            ],
+            'created_at': job.created_at
         })
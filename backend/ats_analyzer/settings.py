@@ -57,10 +57,19 @@ TEMPLATES = [
 WSGI_APPLICATION = 'ats_analyzer.wsgi.application'
 
 # Database
+# SQLite runs in WAL mode so readers do not block the writer, and waits up to
+# `timeout` seconds for a lock instead of failing with "database is locked".
+# IMMEDIATE transactions take the write lock up front, which avoids lock
+# upgrade deadlocks between concurrent uploads.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+        },
     }
 }
 
@@ -126,3 +135,93 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
     'x-frontend-request',  # Add our custom header
 ]
+
+# Uploaded resumes are sniffed, hashed and size-checked while they stream in;
+# files over RESUME_MAX_UPLOAD_SIZE bytes or not PDF/DOCX are rejected before
+# being stored. Each file is buffered in memory up to RESUME_UPLOAD_MEMORY_SIZE
+# bytes and in a temporary file beyond that.
+RESUME_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+RESUME_UPLOAD_MEMORY_SIZE = 512 * 1024
+
+# Zip archives of resumes (`hr/ingest-zip/`, `manage.py ingest_zip`) are read
+# one entry at a time without extracting to disk. To guard against zip bombs an
+# archive may hold at most ZIP_MAX_ENTRIES files expanding to ZIP_MAX_TOTAL_SIZE
+# bytes, and entries over ZIP_MAX_ENTRY_SIZE bytes or compressed more than
+# ZIP_MAX_RATIO times are rejected.
+ZIP_MAX_UPLOAD_SIZE = 100 * 1024 * 1024
+ZIP_MAX_ENTRIES = 1000
+ZIP_MAX_ENTRY_SIZE = RESUME_MAX_UPLOAD_SIZE
+ZIP_MAX_TOTAL_SIZE = 500 * 1024 * 1024
+ZIP_MAX_RATIO = 100
+
+# Resume analysis settings
+# Number of resumes spaCy processes per batch and worker processes used by nlp.pipe
+ANALYZER_BATCH_SIZE = 32
+ANALYZER_N_PROCESS = 1
+
+# Resume parsing runs in bounded process pools; all requests in one server
+# process together use at most PARSER_MAX_WORKERS parse processes (read once
+# at startup). Files taking longer than PARSER_TIMEOUT seconds are reported
+# as failed instead of stalling the batch
+PARSER_MAX_WORKERS = min(4, os.cpu_count() or 1)
+PARSER_TIMEOUT = 120
+
+# Extracted resume text is cached by SHA-256 of the uploaded bytes. Point
+# PARSE_CACHE_ALIAS at a shared entry in CACHES to share it between workers.
+PARSE_CACHE_ALIAS = 'default'
+PARSE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Corpus-wide TF-IDF model built by `manage.py build_corpus`. Workers reload it
+# when the file changes; until it exists similarity falls back to per-pair TF-IDF.
+CORPUS_MODEL_PATH = os.path.join(BASE_DIR, 'var', 'corpus_tfidf.npz')
+
+# Asynchronous analysis queue (`manage.py run_analysis_worker`). Items a worker
+# has held for longer than the lease are handed to another worker.
+ANALYSIS_JOB_LEASE = 15 * 60
+ANALYSIS_JOB_MAX_ATTEMPTS = 3
+
+# Keyword search (`hr/search/`) runs on the KeywordPosting index. How many
+# resumes mention each keyword plans the query and weights its ranking; the
+# counts are cached per worker for SEARCH_STATS_TTL seconds.
+SEARCH_STATS_CACHE_SIZE = 4096
+SEARCH_STATS_TTL = 5 * 60
+# Queries with more words and operators, or more levels of nested NOT and
+# AND/OR groups, are rejected; deeply nested SQL overflows SQLite's parser
+SEARCH_MAX_QUERY_TOKENS = 100
+SEARCH_MAX_QUERY_DEPTH = 10
+
+# spaCy pipeline profile used for keyword extraction: 'fast' drops the parser,
+# sentence splitter and NER that keyword extraction never reads but keeps the
+# tagger and lemmatizer keywords are normalized with; 'full' keeps everything
+SPACY_PIPELINE_PROFILE = 'fast'
+
+# Local resume files of at least this many bytes are memory-mapped for parsing
+# instead of read through a file object
+PARSER_MMAP_THRESHOLD = 1024 * 1024
+
+# PDF extraction: pages with fewer than PDF_OCR_MIN_CHARS characters of text
+# are OCRed one at a time at PDF_OCR_DPI; pages beyond PDF_MAX_PAGES are skipped
+PDF_OCR_DPI = 200
+PDF_OCR_MIN_CHARS = 10
+PDF_MAX_PAGES = 50
+
+# Scanned pages are OCRed concurrently in a per-process thread pool, sized from
+# OCR_MAX_WORKERS once at startup. By default the available cores are split
+# between the PARSER_MAX_WORKERS parse processes.
+OCR_MAX_WORKERS = max(1, (os.cpu_count() or 1) // PARSER_MAX_WORKERS)
+OCR_PAGE_TIMEOUT = 60
+
+# Opt-in request profiling of the upload endpoints. A request is profiled at
+# random with probability PROFILE_SAMPLE_RATE, or when it sends PROFILE_HEADER
+# (off unless set). The header must carry PROFILE_SECRET if one is set, and
+# otherwise is only honored in DEBUG or for authenticated staff users.
+# Profiles are saved to PROFILE_DIR as analysis-<AnalysisResult id>.prof; ones
+# over PROFILE_MAX_BYTES are reduced to a text report, and only the newest
+# PROFILE_MAX_FILES younger than PROFILE_MAX_AGE seconds are kept.
+PROFILE_HEADER = os.environ.get('ATS_PROFILE_HEADER') or None
+PROFILE_SECRET = os.environ.get('ATS_PROFILE_SECRET', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('ATS_PROFILE_SAMPLE_RATE', '0'))
+PROFILE_DIR = os.path.join(BASE_DIR, 'var', 'profiles')
+PROFILE_MAX_BYTES = 5 * 1024 * 1024
+PROFILE_MAX_FILES = 200
+PROFILE_MAX_AGE = 60 * 60 * 24 * 7
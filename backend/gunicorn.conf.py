@@ -0,0 +1,14 @@
+# Gunicorn settings for the backend: `gunicorn -c gunicorn.conf.py ats_analyzer.wsgi`
+#
+# Start with --preload (or ATS_PRELOAD_NLP=1) to load the spaCy and corpus
+# models once in the master process; forked workers then share them
+# copy-on-write instead of each paying the load time and memory.
+import os
+
+preload_app = os.environ.get('ATS_PRELOAD_NLP', '').lower() in ('1', 'true', 'yes')
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from api.utils.analyzer import preload
+        preload()
+        server.log.info('NLP models preloaded before forking workers')
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ats_analyzer.settings')
+
+try:
+    import django
+except ImportError:
+    django = None
+else:
+    # Test modules import the models at collection time
+    django.setup()
+
+@pytest.fixture(scope='session')
+def django_db(tmp_path_factory):
+    """Run Django against a throwaway test database and media directory"""
+    if django is None:
+        pytest.skip('Django is not installed')
+
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+    media = override_settings(MEDIA_ROOT=str(tmp_path_factory.mktemp('media')))
+    media.enable()
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    yield
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    teardown_test_environment()
+    media.disable()
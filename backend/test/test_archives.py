@@ -0,0 +1,112 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+pytest.importorskip('django')
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from api.models import Resume
+from api.utils.archives import ingest_zip, iter_zip_entries
+from api.utils.cache import store_resumes
+
+def make_zip(entries, compression=zipfile.ZIP_STORED):
+    """Build an in-memory zip from (name, data) pairs"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=compression) as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+def resume_bytes(number, size=100):
+    return (b'%PDF-1.4\n%' + str(number).encode()).ljust(size, b'x')
+
+def entries_of(source):
+    return [(name, data is not None, error) for name, data, error in iter_zip_entries(source)]
+
+def test_reads_every_entry_within_the_limits():
+    archive = make_zip([('a.pdf', resume_bytes(1)), ('cv/b.pdf', resume_bytes(2))])
+    assert list(iter_zip_entries(archive)) == [('a.pdf', resume_bytes(1), None), ('cv/b.pdf', resume_bytes(2), None)]
+
+def test_skips_folders_and_metadata():
+    archive = make_zip([
+        ('cv/', b''), ('__MACOSX/cv/._a.pdf', b'x'), ('cv/.DS_Store', b'x'), ('cv/a.pdf', resume_bytes(1)),
+    ])
+    assert [name for name, _, _ in iter_zip_entries(archive)] == ['cv/a.pdf']
+
+@override_settings(ZIP_MAX_ENTRIES=2)
+def test_stops_after_too_many_entries():
+    archive = make_zip([(f'{number}.pdf', resume_bytes(number)) for number in range(5)])
+    assert entries_of(archive) == [
+        ('0.pdf', True, None),
+        ('1.pdf', True, None),
+        ('2.pdf', False, 'Archive holds more than 2 files; the rest were skipped'),
+    ]
+
+@override_settings(ZIP_MAX_ENTRY_SIZE=150)
+def test_rejects_entries_larger_than_the_entry_limit():
+    archive = make_zip([('big.pdf', resume_bytes(1, size=200)), ('small.pdf', resume_bytes(2))])
+    assert entries_of(archive) == [
+        ('big.pdf', False, 'File is larger than 150 bytes'),
+        ('small.pdf', True, None),
+    ]
+
+def test_rejects_entries_compressed_beyond_the_ratio_limit():
+    bomb = b'%PDF-1.4\n' + b'\0' * (settings.ZIP_MAX_RATIO * 1000)
+    archive = make_zip([('bomb.pdf', bomb), ('a.pdf', resume_bytes(1))], compression=zipfile.ZIP_DEFLATED)
+    assert entries_of(archive) == [
+        ('bomb.pdf', False, f'File is compressed more than {settings.ZIP_MAX_RATIO} times'),
+        ('a.pdf', True, None),
+    ]
+
+@override_settings(ZIP_MAX_TOTAL_SIZE=250)
+def test_stops_once_the_total_size_limit_would_be_passed():
+    archive = make_zip([(f'{number}.pdf', resume_bytes(number)) for number in range(4)])
+    assert entries_of(archive) == [
+        ('0.pdf', True, None),
+        ('1.pdf', True, None),
+        ('2.pdf', False, 'Archive expands to more than 250 bytes; the rest were skipped'),
+    ]
+
+def test_entry_lying_about_its_size_is_rejected():
+    data = resume_bytes(1, size=settings.ZIP_MAX_ENTRY_SIZE + 1000)
+    buffer = make_zip([('liar.pdf', data)], compression=zipfile.ZIP_DEFLATED)
+    # Declare a tiny uncompressed size in the central directory so the size checks pass
+    raw = bytearray(buffer.getvalue())
+    central = raw.rfind(b'PK\x01\x02')
+    raw[central + 24:central + 28] = (100).to_bytes(4, 'little')
+    [(name, has_data, error)] = entries_of(io.BytesIO(bytes(raw)))
+    assert name == 'liar.pdf'
+    assert not has_data and error
+
+def test_invalid_archive_is_reported_as_an_error():
+    results, errors, duplicates = ingest_zip(io.BytesIO(b'not a zip archive'), None)
+    assert results == [] and duplicates == []
+    assert len(errors) == 1 and errors[0]['file'] is None
+    assert errors[0]['error'].startswith('Invalid zip archive')
+
+@pytest.mark.usefixtures('django_db')
+class PathTraversalTests(TestCase):
+    def test_entries_are_stored_under_their_base_name(self):
+        archive = make_zip([
+            ('../../evil.pdf', resume_bytes(1)),
+            ('/etc/absolute.pdf', resume_bytes(2)),
+            ('cv/../../../nested.pdf', resume_bytes(3)),
+        ])
+        names = [name for name, _, _ in iter_zip_entries(archive)]
+        stored, errors = store_resumes([ContentFile(data, name=name) for name, data, _ in iter_zip_entries(archive)])
+
+        self.assertEqual(errors, [])
+        self.assertEqual([upload.name for upload, _ in stored], names)
+        media_root = os.path.realpath(settings.MEDIA_ROOT)
+        for _, resume in stored:
+            self.assertEqual(os.path.dirname(resume.file.name), 'resumes')
+            path = os.path.realpath(resume.file.path)
+            self.assertTrue(path.startswith(media_root + os.sep), path)
+            self.assertTrue(os.path.exists(path))
+        self.assertEqual(Resume.objects.count(), 3)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip('django')
+
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import AnalysisJob, AnalysisJobItem, AnalysisResult, JobPosting, Resume
+from api.utils import jobs
+from api.utils.analyzer import ANALYZER_VERSION
+from api.utils.jobs import claim_items, enqueue_resumes, process_items
+
+@pytest.mark.usefixtures('django_db')
+class AnalysisJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.posting = JobPosting.objects.create(description='Python developer', content_hash='jobs',
+                                                analyzer_version=ANALYZER_VERSION)
+
+    def setUp(self):
+        self.resumes = [Resume.objects.create(file=f'resumes/{number}.pdf') for number in range(3)]
+        self.job = enqueue_resumes([(f'{number}.pdf', resume) for number, resume in enumerate(self.resumes)],
+                                   self.posting)
+        self.analyzed = []
+
+        def fake_analyze(resumes, job_posting):
+            """Record an analysis per resume without running the analyzer"""
+            outcomes = []
+            for resume in resumes:
+                self.analyzed.append(resume.id)
+                analysis = AnalysisResult.objects.create(resume=resume, job_posting=job_posting,
+                                                         keywords_matched=[], score=0.5)
+                outcomes.append({'analysis': analysis})
+            return outcomes
+
+        patcher = pytest.MonkeyPatch()
+        patcher.setattr(jobs, 'analyze_stored_resumes', fake_analyze)
+        self.addCleanup(patcher.undo)
+
+    def expire_leases(self, *items):
+        expired = timezone.now() - timedelta(seconds=settings.ANALYSIS_JOB_LEASE + 60)
+        AnalysisJobItem.objects.filter(id__in=[item.id for item in items]).update(claimed_at=expired)
+
+    def test_claims_are_exclusive(self):
+        first = claim_items('worker-1', 2)
+        second = claim_items('worker-2', 2)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({item.id for item in first} & {item.id for item in second})
+        for item in first + second:
+            self.assertEqual(item.status, 'RUNNING')
+            self.assertEqual(item.attempts, 1)
+        self.assertEqual(claim_items('worker-3', 2), [])
+
+    def test_running_items_are_reclaimed_once_their_lease_expires(self):
+        [item] = claim_items('worker-1', 1)
+        claim_items('worker-1', 2)
+        self.assertEqual(claim_items('worker-2', 1), [])
+
+        self.expire_leases(item)
+        [reclaimed] = claim_items('worker-2', 1)
+        self.assertEqual(reclaimed.id, item.id)
+        self.assertEqual(reclaimed.worker, 'worker-2')
+        self.assertEqual(reclaimed.attempts, 2)
+
+    def test_processing_records_each_outcome(self):
+        items = claim_items('worker-1', 3)
+        self.assertEqual(process_items(items), items)
+
+        for item in AnalysisJobItem.objects.filter(job=self.job):
+            self.assertEqual(item.status, 'DONE')
+            self.assertEqual(item.analysis.resume_id, item.resume_id)
+        self.assertEqual(sorted(self.analyzed), sorted(resume.id for resume in self.resumes))
+
+    def test_items_are_given_up_after_max_attempts(self):
+        AnalysisJobItem.objects.filter(job=self.job).update(
+            status='RUNNING', attempts=settings.ANALYSIS_JOB_MAX_ATTEMPTS, worker='dead-worker')
+        self.expire_leases(*AnalysisJobItem.objects.filter(job=self.job))
+
+        items = claim_items('worker-1', 3)
+        self.assertEqual(len(process_items(items)), 3)
+
+        self.assertEqual(self.analyzed, [])
+        for item in AnalysisJobItem.objects.filter(job=self.job):
+            self.assertEqual(item.status, 'FAILED')
+            self.assertEqual(item.error, f'Gave up after {settings.ANALYSIS_JOB_MAX_ATTEMPTS} attempts')
+            self.assertIsNone(item.analysis)
+
+    def test_worker_that_lost_its_lease_does_not_overwrite_the_new_owner(self):
+        [stale] = claim_items('worker-1', 1)
+        self.expire_leases(stale)
+        [current] = claim_items('worker-2', 1)
+        self.assertEqual(current.id, stale.id)
+
+        self.assertEqual(process_items([current]), [current])
+        # The slow worker finishes after the item was taken over
+        self.assertEqual(process_items([stale]), [])
+
+        item = AnalysisJobItem.objects.get(id=stale.id)
+        self.assertEqual(item.worker, 'worker-2')
+        self.assertEqual(item.status, 'DONE')
+        self.assertEqual(item.analysis_id, current.analysis.id)
+        self.assertEqual(AnalysisResult.objects.filter(resume=item.resume).count(), 1)
+        self.assertIsNone(stale.analysis)
@@ -0,0 +1,28 @@
+import pytest
+
+spacy = pytest.importorskip('spacy')
+pytest.importorskip('django')
+
+from api.utils import analyzer
+
+def test_coverage_weights_keywords_by_job_frequency():
+    job = {'python': 3, 'django': 1, 'docker': 1}
+    matched, missing, coverage = analyzer.keyword_coverage({'docker': 2, 'python': 1, 'java': 4}, job)
+    assert matched == ['python', 'docker']
+    assert missing == ['django']
+    assert coverage == pytest.approx(0.8)
+
+def test_coverage_of_empty_job_is_zero():
+    assert analyzer.keyword_coverage({'python': 1}, {}) == ([], [], 0)
+
+@pytest.mark.skipif(not spacy.util.is_package(analyzer.SPACY_MODEL),
+                    reason=f'spaCy model {analyzer.SPACY_MODEL} is not installed')
+def test_skill_phrases_count_under_their_canonical_name():
+    nlp = analyzer.load_pipeline('fast')
+    keywords = analyzer._keywords_from_doc(nlp(
+        'Built RESTful APIs and data pipelines on Amazon Web Services with Machine Learning and CI/CD.'
+    ))
+    for skill in ('rest api', 'data pipeline', 'aws', 'machine learning', 'ci/cd'):
+        assert keywords[skill] == 1
+    # Words inside a matched phrase are not counted again on their own
+    assert 'machine' not in keywords and 'pipeline' not in keywords
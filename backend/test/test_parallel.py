@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('django')
+
+from api.utils import parallel
+from api.utils.metrics import collect_timings, get_histogram
+
+def fake_parse(file_path, kind=None, timings=None):
+    """Stand-in for parse_resume"""
+    if file_path.startswith('slow:'):
+        # Leave the pid behind so the test can check the worker was killed
+        with open(file_path[len('slow:'):], 'w') as f:
+            f.write(str(os.getpid()))
+        time.sleep(60)
+    if file_path == 'scanned.pdf':
+        timings.extend([
+            {'page': 1, 'rasterize_seconds': 0.25, 'ocr_seconds': 1.5},
+            {'page': 2, 'rasterize_seconds': 0.25, 'ocr_seconds': 0.5},
+        ])
+    return f'text of {file_path}'
+
+def fake_worker(source):
+    """Patched in for _parse_worker, which workers import by name from this module.
+
+    Workers start from a fresh interpreter, so patching parse_resume in the
+    test process would not reach them; each patches its own copy instead.
+    """
+    parallel.parse_resume = fake_parse
+    return parallel._parse_worker(source)
+
+@pytest.fixture
+def fake_workers(monkeypatch):
+    monkeypatch.setattr(parallel, '_parse_worker', fake_worker)
+
+@pytest.mark.usefixtures('fake_workers')
+def test_worker_ocr_timings_reach_the_request_timings():
+    pages_before = get_histogram('ocr').snapshot()[2]
+
+    with collect_timings() as timings:
+        results = parallel.parse_resumes(['scanned.pdf', 'digital.pdf'], max_workers=2, timeout=30)
+
+    assert results == [
+        {'text': 'text of scanned.pdf', 'error': None},
+        {'text': 'text of digital.pdf', 'error': None},
+    ]
+    assert timings['ocr'] == pytest.approx(2.0)
+    assert timings['rasterize'] == pytest.approx(0.5)
+    # One histogram observation per page
+    assert get_histogram('ocr').snapshot()[2] == pages_before + 2
+
+def running(pid):
+    """Whether a process exists and has not exited, zombies included as exited"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+@pytest.mark.usefixtures('fake_workers')
+def test_slow_file_times_out_without_holding_up_the_rest(tmp_path):
+    pid_file = tmp_path / 'pid'
+    files = ['first.pdf', f'slow:{pid_file}', 'second.pdf', 'third.pdf']
+
+    start = time.monotonic()
+    results = parallel.parse_resumes(files, max_workers=2, timeout=1)
+    assert time.monotonic() - start < 30
+
+    assert results[1] == {'text': None, 'error': 'Timed out after 1 seconds'}
+    for index in (0, 2, 3):
+        assert results[index] == {'text': f'text of {files[index]}', 'error': None}
+
+    if os.path.exists('/proc'):
+        pid = int(pid_file.read_text())
+        deadline = time.monotonic() + 5
+        while running(pid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not running(pid)
+
+def test_concurrent_requests_share_the_worker_limit(monkeypatch):
+    monkeypatch.setattr(parallel, '_worker_slots', threading.BoundedSemaphore(3))
+    assert parallel._acquire_slots(2) == 2
+    # Only what is left is handed out, and nothing is waited for beyond one slot
+    assert parallel._acquire_slots(4) == 1
+    parallel._release_slots(2)
+    assert parallel._acquire_slots(4) == 2
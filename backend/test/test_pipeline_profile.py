@@ -0,0 +1,54 @@
+import pytest
+
+spacy = pytest.importorskip('spacy')
+pytest.importorskip('django')
+
+from api.utils import analyzer
+
+pytestmark = pytest.mark.skipif(
+    not spacy.util.is_package(analyzer.SPACY_MODEL),
+    reason=f'spaCy model {analyzer.SPACY_MODEL} is not installed',
+)
+
+FIXTURE_CORPUS = [
+    """
+    John Doe
+    Senior Software Engineer
+
+    Experience:
+    - Led a team of five developers building REST APIs in Python and Django
+    - Migrated legacy services to AWS using Docker and Kubernetes
+    - Designed CI/CD pipelines and improved deployment frequency by 40%
+    """,
+    """
+    Senior Software Engineer
+
+    Requirements:
+    - 5+ years experience in software development
+    - Strong Python and Django experience
+    - Experience with cloud platforms such as AWS or GCP
+    - Knowledge of CI/CD pipelines and infrastructure as code
+    """,
+    """
+    Data Analyst with a background in statistics. Built dashboards in Tableau,
+    wrote complex SQL queries, and automated weekly reporting with pandas.
+    Presented findings to executive stakeholders and mentored junior analysts.
+    """,
+    "Machine learning engineer: trained, evaluated and deployed NLP models.",
+    "",
+]
+
+@pytest.fixture(scope='module')
+def pipelines():
+    return analyzer.load_pipeline('full'), analyzer.load_pipeline('fast')
+
+def test_fast_profile_excludes_unused_components(pipelines):
+    _, fast = pipelines
+    for component in analyzer.PIPELINE_PROFILES['fast']:
+        assert component not in fast.component_names
+    assert {'tok2vec', 'tagger', 'attribute_ruler', 'lemmatizer'} <= set(fast.component_names)
+
+@pytest.mark.parametrize('text', FIXTURE_CORPUS)
+def test_fast_profile_keywords_match_full_pipeline(pipelines, text):
+    full, fast = pipelines
+    assert analyzer._keywords_from_doc(fast(text)) == analyzer._keywords_from_doc(full(text))
@@ -0,0 +1,80 @@
+import os
+import pstats
+
+import pytest
+
+pytest.importorskip('django')
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+
+from api.utils.profiling import profiled
+
+def streamed_work():
+    return sum(range(1000))
+
+class Views:
+    @profiled
+    def plain(self, request):
+        return HttpResponse('ok')
+
+    @profiled
+    def streaming(self, request):
+        return StreamingHttpResponse(f'{streamed_work()}\n' for _ in range(3))
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    with override_settings(PROFILE_DIR=str(tmp_path), PROFILE_HEADER='X-ATS-Profile',
+                           PROFILE_SECRET='s3cret', PROFILE_SAMPLE_RATE=0, DEBUG=False):
+        yield tmp_path
+
+def profiled_request(value='s3cret', user=None):
+    request = RequestFactory().get('/', HTTP_X_ATS_PROFILE=value)
+    request.user = user or AnonymousUser()
+    return request
+
+class Staff:
+    is_authenticated = True
+    is_staff = True
+
+def test_plain_response_names_its_profile(profile_dir):
+    response = Views().plain(profiled_request())
+    assert os.path.exists(profile_dir / response['X-Profile-Artifact'])
+
+def test_streaming_response_profiles_the_streamed_work(profile_dir):
+    response = Views().streaming(profiled_request())
+    # Nothing is saved before the stream is consumed
+    assert not os.listdir(profile_dir)
+    assert b''.join(response.streaming_content) == b'499500\n' * 3
+
+    artifacts = os.listdir(profile_dir)
+    assert len(artifacts) == 1
+    stats = pstats.Stats(str(profile_dir / artifacts[0]))
+    calls = {function: counts[1] for (_, _, function), counts in stats.stats.items()}
+    assert calls['streamed_work'] == 3
+
+def test_header_is_ignored_unless_configured(profile_dir):
+    with override_settings(PROFILE_HEADER=None):
+        response = Views().plain(profiled_request())
+    assert not response.has_header('X-Profile-Artifact')
+    assert not os.listdir(profile_dir)
+
+@pytest.mark.parametrize('value', ['1', 'true', 'wrong', ''])
+def test_header_needs_the_secret(profile_dir, value):
+    response = Views().plain(profiled_request(value))
+    assert not response.has_header('X-Profile-Artifact')
+    assert not os.listdir(profile_dir)
+
+def test_without_a_secret_only_staff_may_ask(profile_dir):
+    with override_settings(PROFILE_SECRET=''):
+        assert not Views().plain(profiled_request('1')).has_header('X-Profile-Artifact')
+        assert Views().plain(profiled_request('1', user=Staff())).has_header('X-Profile-Artifact')
+        with override_settings(DEBUG=True):
+            assert Views().plain(profiled_request('1')).has_header('X-Profile-Artifact')
+
+def test_sampled_profiles_are_not_named_to_the_client(profile_dir):
+    with override_settings(PROFILE_SAMPLE_RATE=1):
+        response = Views().plain(RequestFactory().get('/'))
+    assert not response.has_header('X-Profile-Artifact')
+    assert len(os.listdir(profile_dir)) == 1
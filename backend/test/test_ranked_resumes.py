@@ -0,0 +1,82 @@
+import pytest
+
+pytest.importorskip('django')
+pytest.importorskip('rest_framework')
+
+from django.test import TestCase
+
+from api.models import AnalysisResult, JobPosting, Resume
+
+URL = '/api/hr/ranked/'
+
+@pytest.mark.usefixtures('django_db')
+class RankedResumesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.posting = JobPosting.objects.create(description='Python developer', content_hash='ranked')
+        # Several analyses share a score, so pages must break ties on id
+        cls.scores = [90.0, 75.5, 75.5, 75.5, 60.0, 60.0, 42.25]
+        for number, score in enumerate(cls.scores):
+            resume = Resume.objects.create(file=f'resumes/ranked-{number}.pdf')
+            AnalysisResult.objects.create(
+                resume=resume, job_posting=cls.posting, keywords_matched=[],
+                score=0.5, similarity_score=0.25, ats_score=score,
+            )
+
+    def fetch_all(self, limit, **params):
+        pages = []
+        response = self.client.get(URL, {'limit': limit, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            cursor = pages[-1]['next_cursor']
+            if cursor is None:
+                return pages
+            response = self.client.get(URL, {'limit': limit, 'cursor': cursor, **params})
+
+    def test_cursor_pages_cover_every_analysis_once_in_rank_order(self):
+        expected = list(AnalysisResult.objects.order_by('-ats_score', '-id').values_list('id', flat=True))
+        for limit in (1, 2, 3, 7):
+            pages = self.fetch_all(limit)
+            ids = [result['analysis_id'] for page in pages for result in page['ranked_results']]
+            self.assertEqual(ids, expected)
+
+    def test_ties_on_ats_score_are_split_across_pages(self):
+        pages = self.fetch_all(2)
+        scores = [result['ats_score'] for page in pages for result in page['ranked_results']]
+        self.assertEqual(scores, sorted(self.scores, reverse=True))
+        # The second page starts inside the run of 75.5 scores
+        self.assertEqual([result['ats_score'] for result in pages[1]['ranked_results']], [75.5, 75.5])
+
+    def test_last_page_has_no_cursor(self):
+        pages = self.fetch_all(4)
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(len(pages[-1]['ranked_results']), 3)
+        self.assertIsNone(pages[-1]['next_cursor'])
+
+        exact = self.client.get(URL, {'limit': len(self.scores)}).json()
+        self.assertEqual(len(exact['ranked_results']), len(self.scores))
+        self.assertIsNone(exact['next_cursor'])
+
+    def test_total_is_only_counted_on_the_first_page(self):
+        pages = self.fetch_all(3)
+        self.assertEqual(pages[0]['total_resumes'], len(self.scores))
+        self.assertIsNone(pages[1]['total_resumes'])
+
+    def test_filters_by_job_posting(self):
+        other = JobPosting.objects.create(description='Chef', content_hash='other')
+        page = self.client.get(URL, {'job_posting_id': other.id}).json()
+        self.assertEqual(page['ranked_results'], [])
+        self.assertEqual(page['total_resumes'], 0)
+
+    def test_limit_is_clamped(self):
+        for limit, size in (('0', 1), ('-1', 1), ('1000', len(self.scores))):
+            response = self.client.get(URL, {'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['ranked_results']), size)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'limit': 'ten'}, {'cursor': 'abc'}, {'cursor': '50:x'}, {'cursor': 'nan:3'},
+                       {'job_posting_id': 'abc'}):
+            response = self.client.get(URL, params)
+            self.assertEqual(response.status_code, 400, params)
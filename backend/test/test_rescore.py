@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip('django')
+pytest.importorskip('rest_framework')
+pytest.importorskip('scipy')
+
+from django.test import TestCase
+
+from api.models import JobPosting, Resume
+from api.utils.analyzer import ANALYZER_VERSION
+from api.utils.rescore import rank_stored_resumes
+
+URL = '/api/hr/rescore/'
+
+def stored_resume(name, content_hash, keywords, features_version=ANALYZER_VERSION):
+    return Resume.objects.create(
+        file=f'resumes/{name}', content_hash=content_hash, extracted_text=' '.join(keywords),
+        keywords=keywords, term_counts={keyword: 1 for keyword in keywords},
+        features_version=features_version,
+    )
+
+@pytest.mark.usefixtures('django_db')
+class RescoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.posting = JobPosting.objects.create(
+            description='Python and Django', content_hash='rescore',
+            keywords={'python': 2, 'django': 1}, term_counts={'python': 2, 'django': 1},
+            analyzer_version=ANALYZER_VERSION,
+        )
+        cls.first = stored_resume('first.pdf', 'a' * 64, ['python', 'django'])
+        cls.copies = [stored_resume(f'copy-{number}.pdf', 'a' * 64, ['python', 'django']) for number in range(2)]
+        cls.other = stored_resume('other.pdf', 'b' * 64, ['python'])
+
+    def test_identical_uploads_are_ranked_once(self):
+        results, total, skipped = rank_stored_resumes(self.posting.profile())
+        self.assertEqual((total, skipped), (2, 0))
+        self.assertEqual([result['id'] for result in results], [self.first.id, self.other.id])
+
+    def test_stale_resumes_are_skipped_not_recomputed(self):
+        stale = stored_resume('stale.pdf', 'c' * 64, ['python', 'django'], features_version=ANALYZER_VERSION - 1)
+        Resume.objects.create(file='resumes/unread.pdf', content_hash='d' * 64, extracted_text='python')
+        Resume.objects.create(file='resumes/empty.pdf', content_hash='e' * 64)
+
+        response = self.client.post(URL, {'job_posting_id': self.posting.id})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['total_resumes'], body['skipped_stale']), (2, 2))
+        self.assertNotIn(stale.id, [result['id'] for result in body['results']])
+        stale.refresh_from_db()
+        self.assertEqual(stale.features_version, ANALYZER_VERSION - 1)
+
+    def test_limit_is_clamped(self):
+        for limit, size in ((0, 1), (-5, 1), (10000, 2)):
+            response = self.client.post(URL, {'job_posting_id': self.posting.id, 'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), size)
+
+    def test_invalid_limit_is_rejected(self):
+        response = self.client.post(URL, {'job_posting_id': self.posting.id, 'limit': 'abc'})
+        self.assertEqual(response.status_code, 400)
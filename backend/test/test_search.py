@@ -0,0 +1,139 @@
+import pytest
+
+pytest.importorskip('django')
+pytest.importorskip('rest_framework')
+
+from django.test import TestCase, override_settings
+
+from api.models import KeywordPosting, Resume
+from api.utils import search
+from api.utils.search import index_keywords, parse_query
+
+SKILLS = {'machine learning': 'machine learning', 'k8s': 'kubernetes', 'kubernetes': 'kubernetes'}
+
+@pytest.fixture(autouse=True)
+def plain_normalization(monkeypatch):
+    """Normalize terms without spaCy: skills by a fixed table, other words lowercased"""
+    monkeypatch.setattr(search, 'skill_name', lambda text: SKILLS.get(text.lower()))
+    monkeypatch.setattr(search, 'normalize_keyword', lambda word: SKILLS.get(word.lower(), word.lower()))
+
+def term(keyword):
+    return ('term', keyword)
+
+def test_single_term_is_normalized():
+    assert parse_query('Python') == term('python')
+    assert parse_query('k8s') == term('kubernetes')
+
+def test_operators_are_case_insensitive():
+    assert parse_query('python and django') == ('and', term('python'), term('django'))
+    assert parse_query('python Or django') == ('or', term('python'), term('django'))
+    assert parse_query('not java') == ('not', term('java'))
+
+def test_adjacent_terms_are_anded():
+    assert parse_query('python django') == ('and', term('python'), term('django'))
+
+def test_and_binds_tighter_than_or():
+    assert parse_query('a OR b AND c') == ('or', term('a'), ('and', term('b'), term('c')))
+    assert parse_query('a AND b OR c') == ('or', ('and', term('a'), term('b')), term('c'))
+
+def test_not_binds_tightest():
+    assert parse_query('NOT a AND b') == ('and', ('not', term('a')), term('b'))
+    assert parse_query('NOT NOT a') == ('not', ('not', term('a')))
+
+def test_parentheses_group():
+    assert parse_query('(a OR b) AND c') == ('and', ('or', term('a'), term('b')), term('c'))
+    assert parse_query('NOT (a OR b)') == ('not', ('or', term('a'), term('b')))
+
+def test_operators_chain_to_the_left():
+    assert parse_query('a OR b OR c') == ('or', ('or', term('a'), term('b')), term('c'))
+
+def test_quoted_skill_phrase_is_one_term():
+    assert parse_query('"Machine Learning"') == term('machine learning')
+
+def test_other_quoted_phrases_require_each_word():
+    assert parse_query('"senior engineer"') == ('and', term('senior'), term('engineer'))
+
+def test_quoted_operator_is_a_term():
+    assert parse_query('"or"') == term('or')
+
+def test_terms_keep_punctuation():
+    assert parse_query('c++ OR ci/cd') == ('or', term('c++'), term('ci/cd'))
+
+@pytest.mark.parametrize('query', [
+    '', '   ', 'AND', 'python AND', 'OR python', 'NOT', 'python NOT', '(python', 'python)',
+    '()', '(python OR)', '""', 'python AND AND django', ')python(',
+])
+def test_malformed_queries_raise_value_error(query):
+    with pytest.raises(ValueError):
+        parse_query(query)
+
+@override_settings(SEARCH_MAX_QUERY_TOKENS=5)
+def test_long_queries_are_rejected():
+    parse_query('a OR b OR c')
+    with pytest.raises(ValueError):
+        parse_query('a OR b OR c OR d')
+    with pytest.raises(ValueError):
+        parse_query('a "b c d e f"')
+
+@override_settings(SEARCH_MAX_QUERY_DEPTH=3)
+def test_deeply_nested_queries_are_rejected():
+    # A chain of one operator is a single level
+    parse_query('a OR b OR c OR d AND e')
+    parse_query('NOT (a AND (b OR c))')
+    with pytest.raises(ValueError):
+        parse_query('NOT (a AND (b OR NOT c))')
+
+@pytest.mark.usefixtures('django_db')
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        resumes = [
+            Resume.objects.create(file='resumes/a.pdf', keywords=['python', 'django', 'python']),
+            Resume.objects.create(file='resumes/b.pdf', keywords=['python', 'kubernetes']),
+            Resume.objects.create(file='resumes/c.pdf', keywords=['java']),
+        ]
+        index_keywords(resumes)
+        cls.a, cls.b, cls.c = resumes
+
+    def setUp(self):
+        # Document counts are cached per process
+        search._stats_cache = None
+
+    def search(self, query):
+        return self.client.get('/api/hr/search/', {'q': query})
+
+    def test_boolean_query_runs_against_the_index(self):
+        response = self.search('python AND NOT k8s')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['id'] for result in response.json()['results']], [self.a.id])
+
+        response = self.search('java OR kubernetes')
+        self.assertEqual(sorted(result['id'] for result in response.json()['results']), [self.b.id, self.c.id])
+
+    def test_malformed_queries_are_client_errors(self):
+        for query in ('', 'python AND', '(python', 'NOT', '(' * 200 + 'x' + ')' * 200,
+                      'NOT (a AND ' * 15 + 'x' + ')' * 15):
+            response = self.search(query)
+            self.assertEqual(response.status_code, 400, query)
+            self.assertTrue(response.json()['error'].startswith('Invalid query'))
+
+    def test_limit_is_clamped(self):
+        for limit, size in (('-1', 1), ('0', 1), ('10000', 2)):
+            response = self.client.get('/api/hr/search/', {'q': 'python', 'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), size)
+
+    def test_repeated_uploads_of_a_file_are_found_once(self):
+        copies = [Resume.objects.create(file=f'resumes/copy-{number}.pdf', content_hash='f' * 64,
+                                        keywords=['rust']) for number in range(3)]
+        index_keywords(copies)
+
+        response = self.search('rust')
+        self.assertEqual(response.json()['total_count'], 1)
+        self.assertEqual([result['id'] for result in response.json()['results']], [copies[0].id])
+
+    def test_repeated_resumes_are_indexed_once(self):
+        self.a.keywords = ['go', 'go']
+        index_keywords([self.a, self.b, self.a])
+        self.assertEqual(KeywordPosting.objects.get(resume=self.a, keyword='go').count, 2)
+        self.assertFalse(KeywordPosting.objects.filter(resume=self.a, keyword='python').exists())
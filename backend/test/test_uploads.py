@@ -0,0 +1,110 @@
+import hashlib
+import os
+
+import pytest
+
+pytest.importorskip('django')
+pytest.importorskip('rest_framework')
+
+from django.core.files.uploadedfile import InMemoryUploadedFile, SimpleUploadedFile, TemporaryUploadedFile
+from django.test import TestCase, override_settings
+
+from api.models import JobPosting, Resume
+from api.utils.analyzer import ANALYZER_VERSION
+from api.utils.uploads import ResumeUploadHandler
+
+PDF = b'%PDF-1.4\n' + b'x' * 200
+
+def upload(chunks, name='resume.pdf'):
+    """Stream chunks through a ResumeUploadHandler the way the multipart parser does"""
+    handler = ResumeUploadHandler()
+    handler.new_file('resumes', name, 'application/pdf', None)
+    start = 0
+    for chunk in chunks:
+        handler.receive_data_chunk(chunk, start)
+        start += len(chunk)
+    return handler, handler.file_complete(start)
+
+def chunked(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+def test_small_upload_stays_in_memory():
+    _, file = upload(chunked(PDF, 64))
+    assert isinstance(file, InMemoryUploadedFile)
+    assert file.upload_error is None
+    assert file.resume_kind == 'pdf'
+    assert file.read() == PDF
+    assert file.content_hash == hashlib.sha256(PDF).hexdigest()
+
+def test_unsupported_upload_is_rejected_from_its_first_chunk():
+    handler, file = upload(chunked(b'GIF89a' + b'x' * 200, 64), name='photo.pdf')
+    assert file.upload_error == ResumeUploadHandler.unsupported_message
+    assert handler.buffer is None
+    assert file.size == 0
+    assert file.content_hash is None
+
+@override_settings(RESUME_MAX_UPLOAD_SIZE=100, RESUME_UPLOAD_MEMORY_SIZE=64)
+def test_oversized_upload_is_dropped_before_it_is_buffered():
+    handler, file = upload(chunked(PDF, 64))
+    assert file.upload_error == 'File is larger than 100 bytes'
+    assert handler.buffer is None
+    assert file.size == 0
+    # Chunks after the limit are not even hashed
+    assert handler.size == 128
+
+@override_settings(RESUME_MAX_UPLOAD_SIZE=100, RESUME_UPLOAD_MEMORY_SIZE=10)
+def test_oversized_upload_removes_its_temporary_file():
+    handler = ResumeUploadHandler()
+    handler.new_file('resumes', 'resume.pdf', 'application/pdf', None)
+    handler.receive_data_chunk(PDF[:64], 0)
+    spill = handler.buffer
+    assert isinstance(spill, TemporaryUploadedFile)
+    path = spill.temporary_file_path()
+    handler.receive_data_chunk(PDF[64:128], 64)
+    assert handler.error is not None
+    assert not os.path.exists(path)
+
+@override_settings(RESUME_UPLOAD_MEMORY_SIZE=100)
+def test_large_upload_spills_to_a_temporary_file():
+    _, file = upload(chunked(PDF, 64))
+    try:
+        assert isinstance(file, TemporaryUploadedFile)
+        assert file.upload_error is None
+        assert file.size == len(PDF)
+        with open(file.temporary_file_path(), 'rb') as spilled:
+            assert spilled.read() == PDF
+        assert file.content_hash == hashlib.sha256(PDF).hexdigest()
+    finally:
+        file.close()
+
+@pytest.mark.usefixtures('django_db')
+class BatchUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.posting = JobPosting.objects.create(description='Python developer', content_hash='uploads',
+                                                analyzer_version=ANALYZER_VERSION)
+
+    @override_settings(RESUME_MAX_UPLOAD_SIZE=100)
+    def test_rejecting_every_file_is_a_client_error(self):
+        response = self.client.post('/api/hr/analyze/', {
+            'job_posting_id': self.posting.id,
+            'resumes': [
+                SimpleUploadedFile('big.pdf', PDF, 'application/pdf'),
+                SimpleUploadedFile('notes.txt', b'plain text resume', 'text/plain'),
+            ],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['file'] for error in response.json()['errors']], ['big.pdf', 'notes.txt'])
+        self.assertFalse(Resume.objects.exists())
+
+    def test_malformed_job_posting_id_is_a_client_error(self):
+        for job_posting_id, status_code in (('abc', 400), ('1.5', 400), (self.posting.id + 1000, 404)):
+            response = self.client.post('/api/hr/analyze/', {
+                'job_posting_id': job_posting_id,
+                'resumes': [SimpleUploadedFile('resume.pdf', PDF, 'application/pdf')],
+            })
+            self.assertEqual(response.status_code, status_code, job_posting_id)
+        self.assertFalse(Resume.objects.exists())
+
+        self.assertEqual(self.client.get('/api/job-postings/abc/').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/job-postings/{self.posting.id + 1000}/').status_code, 404)